@@ -5,7 +5,7 @@ Used by crew_setup to build CrewAI agents with the configured LLM.
 from crewai import Agent
 
 
-def create_query_agent(llm):
+def create_query_agent(llm, verbose: bool = True):
     return Agent(
         role="Query Understanding Specialist",
         goal="Understand user questions and extract intent, filters, and requirements",
@@ -13,12 +13,12 @@ def create_query_agent(llm):
         You identify what users want: counts, trends, performance, SLA, or ticket details.
         You extract time ranges, status, priority, and assignees.""",
         llm=llm,
-        verbose=True,
+        verbose=verbose,
         allow_delegation=False,
     )
 
 
-def create_role_agent(llm):
+def create_role_agent(llm, verbose: bool = True):
     return Agent(
         role="Role Awareness Specialist",
         goal="Determine user role and adjust response depth accordingly",
@@ -28,12 +28,12 @@ def create_role_agent(llm):
         - Managers need strategic overview and trends
         You adjust detail and recommendations based on role.""",
         llm=llm,
-        verbose=True,
+        verbose=verbose,
         allow_delegation=False,
     )
 
 
-def create_analytics_agent(llm):
+def create_analytics_agent(llm, verbose: bool = True):
     return Agent(
         role="Analytics Specialist",
         goal="Analyze ticket data and identify trends, bottlenecks, and insights",
@@ -41,12 +41,12 @@ def create_analytics_agent(llm):
         You calculate resolution times, SLA compliance, workload distribution,
         and provide actionable insights, not just numbers.""",
         llm=llm,
-        verbose=True,
+        verbose=verbose,
         allow_delegation=False,
     )
 
 
-def create_response_agent(llm):
+def create_response_agent(llm, verbose: bool = True):
     return Agent(
         role="Response Generation Expert",
         goal="Create clear, conversational, and helpful responses",
@@ -54,6 +54,6 @@ def create_response_agent(llm):
         You use professional yet conversational language, context, and recommendations.
         You format clearly and use emojis when appropriate.""",
         llm=llm,
-        verbose=True,
+        verbose=verbose,
         allow_delegation=False,
     )
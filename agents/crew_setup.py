@@ -1,8 +1,9 @@
 """
-CrewAI crew setup: build LLM (Groq or Ollama), create crew, and process questions.
+CrewAI crew setup: build LLM (Groq, Ollama, or offline replay), create crew, and process questions.
 100% free: use Groq (free tier) or Ollama (local, no API key).
 """
 import os
+import time
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -16,6 +17,18 @@ from agents.agents_config import (
     create_analytics_agent,
     create_response_agent,
 )
+from agents.llm_scheduler import PRIORITY_BATCH, ScheduledChatModel
+from config import (
+    CREW_VERBOSE,
+    LLM_RECORD,
+    LLM_RECORDINGS_PATH,
+    LLM_SCHEDULER,
+    REPLAY_LATENCY_MS,
+    REPLAY_MODE,
+    REPLAY_STRICT,
+    REPLAY_TOKENS_PER_SEC,
+)
+from utils.tracing import tracer
 
 # Config
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq").lower().strip()
@@ -26,7 +39,25 @@ OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2")
 
 
 def _get_llm():
-    """Return CrewAI-compatible LLM: Groq (free cloud) or Ollama (free local)."""
+    """Return CrewAI-compatible LLM: Groq, Ollama, or the offline replay stand-in (optionally recorded)."""
+    if LLM_PROVIDER == "replay":
+        from agents.replay_llm import ReplayChatModel
+        return ReplayChatModel(
+            recordings_path=str(LLM_RECORDINGS_PATH),
+            mode=REPLAY_MODE,
+            strict=REPLAY_STRICT,
+            latency_ms=REPLAY_LATENCY_MS,
+            tokens_per_sec=REPLAY_TOKENS_PER_SEC,
+        )
+    llm = _get_provider_llm()
+    if LLM_RECORD:
+        from agents.replay_llm import RecordingChatModel
+        return RecordingChatModel(inner=llm, recordings_path=str(LLM_RECORDINGS_PATH))
+    return llm
+
+
+def _get_provider_llm():
+    """Return the real provider LLM: Groq (free cloud) or Ollama (free local)."""
     if LLM_PROVIDER == "ollama":
         try:
             try:
@@ -56,41 +87,78 @@ def _get_llm():
     )
 
 
+class _TaskTimer:
+    """Records each sequential crew task as a span, measured from the previous task's completion."""
+
+    def __init__(self):
+        self._last = time.perf_counter()
+
+    def start(self):
+        self._last = time.perf_counter()
+
+    def callback(self, task_name):
+        def _on_done(output):
+            now = time.perf_counter()
+            tracer.observe(f"crew.task.{task_name}", (now - self._last) * 1000)
+            self._last = now
+        return _on_done
+
+
 class ITSupportCrew:
     """Multi-agent crew for IT support ticket analysis."""
 
-    def __init__(self, llm=None):
-        self.llm = llm or _get_llm()
+    def __init__(self, llm=None, priority: int = PRIORITY_BATCH, verbose: bool = CREW_VERBOSE):
+        """
+        priority: scheduler priority for the configured client (lower first, see agents.llm_scheduler).
+        verbose: CrewAI step logging on stdout (slows concurrent runs; default CREW_VERBOSE).
+        """
+        if llm is None:
+            llm = _get_llm()
+            if LLM_SCHEDULER:
+                llm = ScheduledChatModel(inner=llm, priority=priority)
+        self.llm = llm
+        self.verbose = verbose
 
-    def process_question(self, question: str, role: str = "Support Agent", db_results: str = None) -> str:
-        """Run the crew and return the final response."""
-        query_agent = create_query_agent(self.llm)
-        role_agent = create_role_agent(self.llm)
-        analytics_agent = create_analytics_agent(self.llm)
-        response_agent = create_response_agent(self.llm)
+    def process_question(self, question: str, role: str = "Support Agent", db_results: str = None,
+                         similar_tickets: str = None) -> str:
+        """Run the crew and return the final response. similar_tickets: past tickets to reuse resolutions from."""
+        query_agent = create_query_agent(self.llm, self.verbose)
+        role_agent = create_role_agent(self.llm, self.verbose)
+        analytics_agent = create_analytics_agent(self.llm, self.verbose)
+        response_agent = create_response_agent(self.llm, self.verbose)
+        task_timer = _TaskTimer()
 
         task1 = Task(
             description=f'''Analyze this question: "{question}"
             Extract: 1) What is the user asking for? 2) What filters are mentioned? 3) What analysis is needed?
             Provide a structured understanding.''',
             agent=query_agent,
+            callback=task_timer.callback("query_understanding"),
             expected_output="Structured analysis of the question intent and filters",
         )
         task2 = Task(
             description=f'''User role: {role}. Based on the query understanding, determine:
             1) How detailed should the response be? 2) What recommendations? 3) Technical detail level?''',
             agent=role_agent,
+            callback=task_timer.callback("role_awareness"),
             expected_output="Guidelines for response depth and format based on role",
         )
+        analytics_context = f"Analyze this data and compute relevant metrics, insights, and concerns:\n{db_results or 'No data'}"
+        if similar_tickets:
+            analytics_context += (
+                "\n\nSimilar past tickets (reuse their resolutions where relevant):\n" + similar_tickets
+            )
         task3 = Task(
-            description=f'''Analyze this data and compute relevant metrics, insights, and concerns:\n{db_results or "No data"}''',
+            description=analytics_context,
             agent=analytics_agent,
+            callback=task_timer.callback("analytics"),
             expected_output="Data analysis with insights and metrics",
         )
         task4 = Task(
             description=f'''Create a final response for: "{question}"
             Use: query understanding, role guidelines, and analytics. Be clear, conversational, and actionable.''',
             agent=response_agent,
+            callback=task_timer.callback("response"),
             expected_output="Final conversational response for the user",
         )
 
@@ -98,7 +166,9 @@ class ITSupportCrew:
             agents=[query_agent, role_agent, analytics_agent, response_agent],
             tasks=[task1, task2, task3, task4],
             process=Process.sequential,
-            verbose=True,
+            verbose=self.verbose,
         )
-        result = crew.kickoff()
+        task_timer.start()
+        with tracer.span("crew.kickoff"):
+            result = crew.kickoff()
         return str(result)
@@ -0,0 +1,230 @@
+"""
+Process-wide, rate-limit-aware LLM request scheduler shared by all Streamlit sessions.
+Token buckets enforce requests/minute and tokens/minute, waiting callers are served
+in priority order (Managers first, batch jobs last), and 429 responses are retried
+with jittered exponential backoff. Queue depth and wait times feed utils.tracing.
+"""
+import heapq
+import itertools
+import random
+import threading
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from utils.tracing import tracer
+
+try:
+    from config import LLM_COMPLETION_TOKENS, LLM_MAX_RETRIES, LLM_QUEUE_TIMEOUT, LLM_RPM, LLM_TPM
+except ImportError:
+    LLM_RPM, LLM_TPM, LLM_MAX_RETRIES, LLM_COMPLETION_TOKENS, LLM_QUEUE_TIMEOUT = 30, 6000, 4, 256, 120.0
+
+# Lower value = served first.
+ROLE_PRIORITY = {"Manager": 0, "Team Lead": 1, "Support Agent": 2}
+PRIORITY_BATCH = 10
+
+
+def role_priority(role: str) -> int:
+    """Scheduling priority for an interactive user role (unknown roles rank as Support Agent)."""
+    return ROLE_PRIORITY.get(role, ROLE_PRIORITY["Support Agent"])
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def reported_tokens(message) -> Optional[int]:
+    """Total tokens the provider reported for a response (usage_metadata or ChatGroq's token_usage), else None."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    if usage.get("total_tokens"):
+        return usage["total_tokens"]
+    usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+    return usage.get("total_tokens") or None
+
+
+def is_rate_limited(exc: Exception) -> bool:
+    """True for HTTP 429s (status_code on the error or its response) or *RateLimit* error types."""
+    for obj in (exc, getattr(exc, "response", None)):
+        if getattr(obj, "status_code", None) == 429:
+            return True
+    return any("ratelimit" in cls.__name__.lower() for cls in type(exc).__mro__)
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMQueueTimeout(RuntimeError):
+    """Raised when a request waits longer than max_wait for a scheduler slot."""
+
+
+class TokenBucket:
+    """Refills continuously at per_minute / 60 per second up to per_minute. Not thread-safe."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount (capped at capacity) is available."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        """Take amount; may go negative to carry debt when an estimate was low."""
+        self.tokens -= amount
+
+
+class LLMScheduler:
+    """Priority-ordered admission control in front of an LLM provider."""
+
+    def __init__(self, rpm: int = LLM_RPM, tpm: int = LLM_TPM, max_retries: int = LLM_MAX_RETRIES,
+                 backoff_base: float = 1.0, backoff_cap: float = 30.0, max_wait: float = LLM_QUEUE_TIMEOUT):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._seq = itertools.count()
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.rate_limited = 0
+        self.failed = 0
+        self.timed_out = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiting)
+
+    def _acquire(self, priority: int, est_tokens: int):
+        entry = (priority, next(self._seq))
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.max_wait
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._waiting))
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                    self.timed_out += 1
+                    raise LLMQueueTimeout(
+                        f"LLM request waited {self.max_wait:.0f}s for a slot ({len(self._waiting)} still queued)"
+                    )
+                if self._waiting[0] == entry:
+                    wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(est_tokens, now))
+                    if wait <= 0:
+                        self.requests.consume(1)
+                        self.tokens.consume(est_tokens)
+                        heapq.heappop(self._waiting)
+                        self._cond.notify_all()
+                        break
+                    self._cond.wait(timeout=min(wait, deadline - now))
+                else:
+                    self._cond.wait(timeout=deadline - now)
+        tracer.observe("llm.scheduler.wait", (time.perf_counter() - start) * 1000, priority=priority)
+
+    def _count(self, counter: str):
+        with self._cond:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _settle(self, est_tokens: int, actual_tokens: int):
+        with self._cond:
+            self.tokens.consume(actual_tokens - est_tokens)
+
+    def run(self, fn, priority: int = PRIORITY_BATCH, est_tokens: int = 1, count_tokens=None):
+        """
+        Call fn() once admitted; retry 429s with full-jitter backoff.
+        count_tokens(result) -> actual tokens, used to correct the token bucket.
+        """
+        attempt = 0
+        while True:
+            self._acquire(priority, est_tokens)
+            try:
+                result = fn()
+            except Exception as e:
+                if not is_rate_limited(e):
+                    self._count("failed")
+                    raise
+                self._count("rate_limited")
+                if attempt >= self.max_retries:
+                    self._count("failed")
+                    raise
+                delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+                time.sleep(max(delay, _retry_after(e) or 0))
+                attempt += 1
+                continue
+            if count_tokens is not None:
+                self._settle(est_tokens, count_tokens(result))
+            self._count("completed")
+            return result
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "completed": self.completed,
+                "rate_limited": self.rate_limited,
+                "failed": self.failed,
+                "timed_out": self.timed_out,
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """The process-wide scheduler (created on first use)."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+        return _scheduler
+
+
+class ScheduledChatModel(BaseChatModel):
+    """Routes every call of `inner` through the shared LLMScheduler at a fixed priority."""
+
+    inner: Any
+    priority: int = PRIORITY_BATCH
+    scheduler: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return f"scheduled-{getattr(self.inner, '_llm_type', 'llm')}"
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        scheduler = self.scheduler or get_scheduler()
+        prompt_tokens = estimate_tokens("".join(str(m.content) for m in messages))
+        message = scheduler.run(
+            lambda: self.inner.invoke(messages, stop=stop, **kwargs),
+            priority=self.priority,
+            est_tokens=prompt_tokens + LLM_COMPLETION_TOKENS,
+            count_tokens=lambda m: reported_tokens(m) or prompt_tokens + estimate_tokens(str(m.content)),
+        )
+        text = message.content if hasattr(message, "content") else str(message)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
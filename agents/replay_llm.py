@@ -0,0 +1,136 @@
+"""
+Deterministic local LLM stand-ins for offline benchmarking (LLM_PROVIDER=replay).
+- ReplayChatModel: replays recorded responses keyed on a prompt hash, or generates
+  synthetic responses with configurable latency and token rate.
+- RecordingChatModel: wraps a real LLM (Groq/Ollama) and records every exchange.
+Recordings are JSONL files: one {"key", "prompt_chars", "response", "latency_ms"} per line.
+"""
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from utils.tracing import tracer
+
+_FILLER = (
+    "ticket volume priority backlog assignee resolution SLA category trend "
+    "workload escalation queue response insight recommendation metric"
+).split()
+_recordings_cache = {}
+_recordings_lock = threading.Lock()
+
+
+def prompt_key(messages, stop=None) -> str:
+    """Stable hash of the prompt (message types + contents + stop words)."""
+    payload = json.dumps(
+        {"messages": [[m.type, m.content] for m in messages], "stop": list(stop or [])},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _prompt_chars(messages) -> int:
+    return sum(len(str(m.content)) for m in messages)
+
+
+def load_recordings(path) -> dict:
+    """key -> response for a recordings file; cached per (path, mtime)."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    stamp = (str(path), path.stat().st_mtime_ns)
+    with _recordings_lock:
+        if stamp not in _recordings_cache:
+            recordings = {}
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        recordings[entry["key"]] = entry["response"]
+            _recordings_cache.clear()
+            _recordings_cache[stamp] = recordings
+        return _recordings_cache[stamp]
+
+
+def append_recording(path, entry: dict):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _recordings_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+def synthetic_response(key: str, num_tokens: int) -> str:
+    """Deterministic ReAct-style final answer of roughly num_tokens words."""
+    seed = int(key[:8], 16)
+    words = [_FILLER[(seed + i * 7) % len(_FILLER)] for i in range(max(num_tokens - 8, 1))]
+    return f"Thought: I now know the final answer\nFinal Answer: [synthetic {key[:8]}] " + " ".join(words)
+
+
+def _chat_result(text: str) -> ChatResult:
+    return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+class ReplayChatModel(BaseChatModel):
+    """Offline LLM: mode "replay" (synthetic on miss unless strict) or "synthetic"."""
+
+    recordings_path: str = ""
+    mode: str = "replay"
+    strict: bool = False
+    latency_ms: float = 0.0
+    tokens_per_sec: float = 0.0
+    synthetic_tokens: int = 120
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        key = prompt_key(messages, stop)
+        with tracer.span("llm.replay", prompt_chars=_prompt_chars(messages)):
+            text = None
+            if self.mode == "replay" and self.recordings_path:
+                text = load_recordings(self.recordings_path).get(key)
+                if text is None and self.strict:
+                    raise KeyError(f"No recorded response for prompt {key[:12]} in {self.recordings_path}")
+            if text is None:
+                text = synthetic_response(key, self.synthetic_tokens)
+            self._simulate_latency(text)
+        return _chat_result(text)
+
+    def _simulate_latency(self, text: str):
+        delay = self.latency_ms / 1000
+        if self.tokens_per_sec > 0:
+            delay += len(text.split()) / self.tokens_per_sec
+        if delay > 0:
+            time.sleep(delay)
+
+
+class RecordingChatModel(BaseChatModel):
+    """Pass-through wrapper that appends each real exchange to recordings_path."""
+
+    inner: Any
+    recordings_path: str
+
+    @property
+    def _llm_type(self) -> str:
+        return f"recording-{getattr(self.inner, '_llm_type', 'llm')}"
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        start = time.perf_counter()
+        message = self.inner.invoke(messages, stop=stop, **kwargs)
+        latency_ms = (time.perf_counter() - start) * 1000
+        text = message.content if hasattr(message, "content") else str(message)
+        append_recording(self.recordings_path, {
+            "key": prompt_key(messages, stop),
+            "prompt_chars": _prompt_chars(messages),
+            "response": text,
+            "latency_ms": round(latency_ms, 3),
+        })
+        return _chat_result(text)
@@ -11,18 +11,15 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Project imports
-from config import LLM_PROVIDER, GROQ_API_KEY, DATABASE_PATH, SUPPORT_ROLES
-from database.db_manager import DBManager
+from config import LLM_PROVIDER, GROQ_API_KEY, DATABASE_PATH, SUPPORT_ROLES, EXAMPLE_QUESTIONS
+from database.db_manager import DBManager, LIST_COLUMNS
 from database.sample_data import generate_sample_tickets
-from utils.query_processor import analyze_question
-from utils.analytics import format_db_results, results_to_json_string
+from utils.analytics import iter_csv
+from utils.pipeline import AGENTS_AVAILABLE, answer_question
+from utils.tracing import tracer
 
-try:
-    from agents.crew_setup import ITSupportCrew
-    AGENTS_AVAILABLE = True
-except Exception as e:
-    AGENTS_AVAILABLE = False
-    _agents_error = str(e)
+if AGENTS_AVAILABLE:
+    from agents.llm_scheduler import get_scheduler
 
 st.set_page_config(
     page_title="IT Support Intelligence Bot",
@@ -37,25 +34,65 @@ if "user_role" not in st.session_state:
     st.session_state.user_role = "Support Agent"
 
 
+@st.cache_resource
+def _migrate_database():
+    """Bring an existing DB's schema up to date (e.g. TICKET_PARTITIONING), once per app process."""
+    from database.db_manager import DBManager
+    DBManager().create_tables()
+
+
 def ensure_database():
-    """Create DB and sample data if missing (first run)."""
+    """Create DB and sample data if missing (first run); otherwise migrate its schema."""
     if not DATABASE_PATH.exists():
         from database.db_manager import DBManager
         db = DBManager()
         db.create_tables()
         generate_sample_tickets(num_tickets=200)
         st.sidebar.success("✅ Sample database created with 200 tickets.")
+    _migrate_database()
 
 
 def check_llm_setup():
     """Check if LLM is configured (Groq or Ollama)."""
-    if LLM_PROVIDER == "ollama":
-        return True, "ollama"
+    if LLM_PROVIDER in ("ollama", "replay"):
+        return True, LLM_PROVIDER
     if GROQ_API_KEY:
         return True, "groq"
     return False, None
 
 
+def export_tickets_csv(analysis: dict):
+    """
+    CSV bytes for matching tickets. Rows are read from SQLite in chunks, but
+    st.download_button serves a complete file, so the finished CSV is held in memory.
+    """
+    return "".join(iter_csv(DBManager().iter_tickets(analysis), LIST_COLUMNS)).encode("utf-8")
+
+
+def render_ticket_list(analysis: dict, key: str, page_size: int = 25):
+    """Paginated ticket table (keyset cursors kept in session state) with a CSV export."""
+    cursors = st.session_state.setdefault(f"{key}_cursors", [None])
+    page = DBManager().list_tickets(analysis, after=cursors[-1], page_size=page_size)
+    st.dataframe(page["tickets"], hide_index=True, use_container_width=True)
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        if len(cursors) > 1 and st.button("◀ Previous", key=f"{key}_prev"):
+            cursors.pop()
+            st.rerun()
+    with c2:
+        if page["next_cursor"] and st.button("Next ▶", key=f"{key}_next"):
+            cursors.append(page["next_cursor"])
+            st.rerun()
+    with c3:
+        st.download_button(
+            "⬇️ Export CSV",
+            data=lambda: export_tickets_csv(analysis),
+            file_name="tickets.csv",
+            mime="text/csv",
+            key=f"{key}_export",
+        )
+
+
 def render_sidebar():
     st.sidebar.title("⚙️ Settings")
     st.sidebar.subheader("👤 Your Role")
@@ -73,34 +110,7 @@ def render_sidebar():
         """)
     st.sidebar.divider()
     st.sidebar.subheader("💡 Example Questions")
-    examples = {
-        "📊 General": [
-            "How many tickets are currently open?",
-            "What's the total number of tickets?",
-            "Show me ticket breakdown by status",
-        ],
-        "⚡ Priority": [
-            "How many critical tickets do we have?",
-            "Show me high priority tickets",
-            "What's the distribution by priority?",
-        ],
-        "⏱️ Performance": [
-            "What's the average resolution time?",
-            "Show me performance metrics",
-            "Which category takes longest to resolve?",
-        ],
-        "📅 SLA": [
-            "What's our SLA compliance rate?",
-            "How many tickets are overdue?",
-            "Show me SLA violations this week",
-        ],
-        "👥 Assignees": [
-            "Who has the most open tickets?",
-            "Show me assignee workload",
-            "Which team member resolved most tickets?",
-        ],
-    }
-    for cat, questions in examples.items():
+    for cat, questions in EXAMPLE_QUESTIONS.items():
         with st.sidebar.expander(cat):
             for q in questions:
                 if st.button(q, key=f"ex_{hash(q)}", use_container_width=True):
@@ -117,35 +127,34 @@ def render_sidebar():
         **Role**: {st.session_state.user_role}  
         **Conversations**: {len(st.session_state.chat_history)}
         """)
+        if AGENTS_AVAILABLE:
+            sched = get_scheduler().stats()
+            st.write(
+                f"**LLM queue**: {sched['queue_depth']} waiting (max {sched['max_queue_depth']}), "
+                f"{sched['rate_limited']} rate-limited retries"
+            )
+        stages = tracer.summary()
+        if stages:
+            st.caption("⏱️ Stage latency (ms)")
+            st.dataframe(stages, hide_index=True, use_container_width=True)
+        if tracer.slow_queries:
+            st.caption(f"🐢 Slow queries (>{tracer.slow_query_ms:.0f} ms): {len(tracer.slow_queries)}")
+            st.json(list(tracer.slow_queries)[-3:], expanded=False)
+        st.download_button(
+            "Prometheus metrics",
+            data=tracer.prometheus_text(),
+            file_name="metrics.prom",
+            mime="text/plain",
+            use_container_width=True,
+        )
+        if st.button("Export histograms (JSONL)", use_container_width=True):
+            st.caption(f"Appended to {tracer.export_jsonl().name}")
 
 
 def process_question(question: str, role: str):
     """Run query pipeline: analyze -> DB -> agents (or fallback)."""
     with st.spinner("🤔 Thinking..."):
-        analysis = analyze_question(question)
-        db = DBManager()
-        db_results = db.execute_query(analysis)
-        formatted = results_to_json_string(db_results)
-        if AGENTS_AVAILABLE:
-            try:
-                crew = ITSupportCrew()
-                response = crew.process_question(
-                    question=question,
-                    role=role,
-                    db_results=formatted,
-                )
-                return response, db_results
-            except Exception as e:
-                response = (
-                    f"📊 **Results:**\n\n{format_db_results(db_results)}\n\n"
-                    f"⚠️ AI unavailable: {e}"
-                )
-                return response, db_results
-        response = (
-            f"📊 **Results:**\n\n{format_db_results(db_results)}\n\n"
-            "💡 Add GROQ_API_KEY to .env or set LLM_PROVIDER=ollama for AI responses."
-        )
-        return response, db_results
+        return answer_question(question, role)
 
 
 def main():
@@ -160,11 +169,13 @@ def main():
             "⚠️ Running in basic mode. Set GROQ_API_KEY in .env or use LLM_PROVIDER=ollama for AI."
         )
 
-    for chat in st.session_state.chat_history:
+    for i, chat in enumerate(st.session_state.chat_history):
         with st.chat_message("user"):
             st.write(chat["question"])
         with st.chat_message("assistant"):
             st.write(chat["response"])
+            if chat.get("data", {}).get("query_type") == "list":
+                render_ticket_list(chat["data"]["filters"], key=f"list_{i}")
             if chat.get("data"):
                 with st.expander("📊 View Detailed Data"):
                     st.json(chat["data"])
@@ -182,8 +193,10 @@ def main():
         with st.chat_message("user"):
             st.write(question)
         response, data = process_question(question, st.session_state.user_role)
-        with st.chat_message("assistant"):
+        with tracer.span("pipeline.render"), st.chat_message("assistant"):
             st.write(response)
+            if data.get("query_type") == "list":
+                render_ticket_list(data["filters"], key=f"list_{len(st.session_state.chat_history)}")
             with st.expander("📊 View Detailed Data"):
                 st.json(data)
         st.session_state.chat_history.append({
@@ -0,0 +1,28 @@
+"""
+Retention job: move tickets resolved more than N days ago into the compressed archive.
+Run periodically: python archive_tickets.py [--days 180] [--vacuum]
+"""
+import argparse
+
+from config import ARCHIVE_AFTER_DAYS, DATABASE_PATH
+from database.db_manager import DBManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old resolved/closed tickets.")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS,
+                        help=f"archive tickets resolved more than this many days ago (default {ARCHIVE_AFTER_DAYS})")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to return freed pages to the OS")
+    args = parser.parse_args()
+    db = DBManager()
+    moved = db.archive_resolved(older_than_days=args.days)
+    print(f"✅ Archived {moved} tickets resolved more than {args.days} days ago ({DATABASE_PATH.name}).")
+    if args.vacuum:
+        conn = db.connect()
+        conn.execute("VACUUM")
+        conn.close()
+        print("✅ Database vacuumed.")
+
+
+if __name__ == "__main__":
+    main()
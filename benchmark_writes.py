@@ -0,0 +1,108 @@
+"""
+Write-path throughput benchmark: group-commit writer vs. one commit per write.
+Run: python benchmark_writes.py [--writes 20000] [--producers 8] [--partitioned]
+Uses a temporary database; nothing in data/ is touched.
+"""
+import argparse
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from database.db_manager import DBManager
+from database.sample_data import sample_ticket_rows
+
+
+def _seed(path, partitioned):
+    db = DBManager(path, partitioned=partitioned)
+    db.create_tables()
+    ids = db.insert_tickets(sample_ticket_rows(1000))
+    return db, ids
+
+
+def _ops(n, ids):
+    """Realistic webhook mix: 20% creates, 60% updates, 20% resolves."""
+    template = sample_ticket_rows(1)[0]
+    for i in range(n):
+        r = random.random()
+        if r < 0.2:
+            yield "create", dict(template, created_at=None, updated_at=None, sla_deadline=None)
+        elif r < 0.8:
+            yield "update", random.choice(ids), {"assignee": random.choice(["Sarah Ali", "Omar Saeed"])}
+        else:
+            yield "resolve", random.choice(ids)
+
+
+def bench_group_commit(path, n, producers, partitioned):
+    db, ids = _seed(path, partitioned)
+    ops = list(_ops(n, ids))
+    chunks = [ops[i::producers] for i in range(producers)]
+    futures = []
+
+    def produce(chunk):
+        for op in chunk:
+            if op[0] == "create":
+                fields = {k: v for k, v in op[1].items() if v is not None}
+                futures.append(db.create_ticket(**fields))
+            elif op[0] == "update":
+                futures.append(db.update_ticket(op[1], **op[2]))
+            else:
+                futures.append(db.resolve_ticket(op[1]))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=produce, args=(c,)) for c in chunks]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for f in futures:
+        f.result()
+    elapsed = time.perf_counter() - start
+    stats = db.writer.stats()
+    db.writer.stop()
+    return elapsed, stats
+
+
+def bench_commit_per_write(path, n, partitioned):
+    db, ids = _seed(path, partitioned)
+    conn = db.connect()
+    # Same durability settings as TicketWriter, so the runs differ only in commit batching.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=FULL")
+    start = time.perf_counter()
+    for op in _ops(n, ids):
+        if op[0] == "create":
+            db._apply_write(conn, "create", {k: v for k, v in op[1].items() if v is not None})
+        elif op[0] == "update":
+            db._apply_write(conn, "update", op[1], op[2])
+        else:
+            db._apply_write(conn, "update", op[1], {"status": "Resolved", "resolved_at": datetime.now()})
+        conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ticket write path.")
+    parser.add_argument("--writes", type=int, default=20000)
+    parser.add_argument("--producers", type=int, default=8)
+    parser.add_argument("--partitioned", action="store_true")
+    parser.add_argument("--skip-baseline", action="store_true", help="skip the slow commit-per-write run")
+    args = parser.parse_args()
+    random.seed(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        elapsed, stats = bench_group_commit(Path(tmp) / "group.db", args.writes, args.producers, args.partitioned)
+        print(f"🚀 Group commit: {args.writes} writes from {args.producers} producers in {elapsed:.2f}s "
+              f"→ {args.writes / elapsed:,.0f} writes/s ({stats['batches']} batches, "
+              f"avg {stats['committed'] / max(stats['batches'], 1):.0f} writes/batch)")
+        if not args.skip_baseline:
+            baseline_n = min(args.writes, 2000)
+            elapsed = bench_commit_per_write(Path(tmp) / "naive.db", baseline_n, args.partitioned)
+            print(f"🐢 Commit per write: {baseline_n} writes in {elapsed:.2f}s → {baseline_n / elapsed:,.0f} writes/s")
+
+
+if __name__ == "__main__":
+    main()
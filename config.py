@@ -19,8 +19,24 @@ DATA_DIR.mkdir(exist_ok=True)
 # Database
 DB_NAME = os.getenv("DB_NAME", "support_tickets.db")
 DATABASE_PATH = DATA_DIR / DB_NAME
+# Prepared statements cached per SQLite connection (sqlite3 default is 128)
+SQLITE_CACHED_STATEMENTS = int(os.getenv("SQLITE_CACHED_STATEMENTS", "256"))
+# Idle read connections kept per database and shared by all threads (statement caches stay warm)
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+# Monthly ticket partitions behind a `tickets` view (existing tables are migrated on create_tables)
+TICKET_PARTITIONING = os.getenv("TICKET_PARTITIONING", "false").lower().strip() in ("1", "true", "yes")
+# Resolved/closed tickets older than this move to the compressed archive (python archive_tickets.py)
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "180"))
+# Write path: one background writer commits queued writes in batches (group commit)
+WRITER_MAX_QUEUE = int(os.getenv("WRITER_MAX_QUEUE", "10000"))
+WRITER_MAX_BATCH = int(os.getenv("WRITER_MAX_BATCH", "500"))
+WRITER_MAX_LATENCY_MS = float(os.getenv("WRITER_MAX_LATENCY_MS", "10"))
+# Anomaly detection: EWMA smoothing of daily counts, |z| alert threshold, days before alerting
+ANOMALY_ALPHA = float(os.getenv("ANOMALY_ALPHA", "0.1"))
+ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "3.0"))
+ANOMALY_WARMUP_DAYS = int(os.getenv("ANOMALY_WARMUP_DAYS", "14"))
 
-# LLM: "groq" (free cloud) or "ollama" (100% local, no API key)
+# LLM: "groq" (free cloud), "ollama" (100% local, no API key), or "replay" (offline benchmarking)
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq").lower().strip()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-70b-versatile")
@@ -29,8 +45,79 @@ GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-70b-versatile")
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2")
 
+# Replay / record (deterministic offline LLM for benchmarks)
+LLM_RECORD = os.getenv("LLM_RECORD", "false").lower().strip() in ("1", "true", "yes")
+LLM_RECORDINGS_PATH = DATA_DIR / os.getenv("LLM_RECORDINGS_FILE", "llm_recordings.jsonl")
+REPLAY_MODE = os.getenv("REPLAY_MODE", "replay").lower().strip()
+REPLAY_STRICT = os.getenv("REPLAY_STRICT", "false").lower().strip() in ("1", "true", "yes")
+REPLAY_LATENCY_MS = float(os.getenv("REPLAY_LATENCY_MS", "0"))
+REPLAY_TOKENS_PER_SEC = float(os.getenv("REPLAY_TOKENS_PER_SEC", "0"))
+
+# Shared rate-limit-aware LLM scheduler (on by default only for the rate-limited Groq API).
+# Defaults match the Groq free tier for llama-3.1-70b.
+LLM_SCHEDULER = os.getenv(
+    "LLM_SCHEDULER", "true" if LLM_PROVIDER == "groq" else "false"
+).lower().strip() in ("1", "true", "yes")
+LLM_RPM = int(os.getenv("LLM_RPM", "30"))
+LLM_TPM = int(os.getenv("LLM_TPM", "6000"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_COMPLETION_TOKENS = int(os.getenv("LLM_COMPLETION_TOKENS", "256"))
+# Longest a request waits for a scheduler slot before failing (seconds)
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "120"))
+
+# CrewAI step-by-step agent output on stdout (load_test.py always turns it off)
+CREW_VERBOSE = os.getenv("CREW_VERBOSE", "true").lower().strip() in ("1", "true", "yes")
+
+# Similar-ticket retrieval (offline hashing vectorizer + memory-mapped index in data/)
+VECTOR_DIM = int(os.getenv("VECTOR_DIM", "512"))
+SIMILAR_TICKETS_K = int(os.getenv("SIMILAR_TICKETS_K", "5"))
+
 # Logging
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
+# Latency tracing: SQL slower than SLOW_QUERY_MS is logged with its query plan
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG_PATH = DATA_DIR / os.getenv("SLOW_QUERY_LOG", "slow_queries.jsonl")
+METRICS_PATH = DATA_DIR / os.getenv("METRICS_FILE", "metrics.jsonl")
+
 # Roles
 SUPPORT_ROLES = ["Support Agent", "Team Lead", "Manager"]
+
+# Sidebar example questions (also the load_test.py question mix)
+EXAMPLE_QUESTIONS = {
+    "📊 General": [
+        "How many tickets are currently open?",
+        "What's the total number of tickets?",
+        "Show me ticket breakdown by status",
+    ],
+    "⚡ Priority": [
+        "How many critical tickets do we have?",
+        "Show me high priority tickets",
+        "What's the distribution by priority?",
+    ],
+    "⏱️ Performance": [
+        "What's the average resolution time?",
+        "Show me performance metrics",
+        "Which category takes longest to resolve?",
+    ],
+    "📅 SLA": [
+        "What's our SLA compliance rate?",
+        "How many tickets are overdue?",
+        "Show me SLA violations this week",
+    ],
+    "👥 Assignees": [
+        "Who has the most open tickets?",
+        "Show me assignee workload",
+        "Which team member resolved most tickets?",
+    ],
+    "📋 Lists": [
+        "List critical open tickets assigned to Sarah",
+        "List high priority tickets this week",
+        "Export all pending tickets",
+    ],
+    "🚨 Anomalies": [
+        "Is anything unusual happening?",
+        "Any spikes in critical tickets?",
+        "Any unusual VPN ticket volume?",
+    ],
+}
@@ -0,0 +1,346 @@
+"""
+Streaming anomaly detection over daily ticket volume and SLA breaches.
+One detector per stream (all tickets, each category, each priority) keeps an EWMA
+baseline of its daily counts plus day-of-week seasonal means. Detectors catch up
+from commit-ordered high-water marks (last ticket_id, last sla_breach_log seq) after
+every writer batch and before every report, so tickets written by insert_tickets or
+another process are counted too. State is checkpointed to SQLite, so a restart only
+reads rows past the marks.
+"""
+import json
+import math
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from database.db_manager import BREACH_LOG, _as_datetime
+from database.query_builder import TicketQuery
+from utils.tracing import tracer
+
+try:
+    from config import ANOMALY_ALPHA, ANOMALY_WARMUP_DAYS, ANOMALY_Z_THRESHOLD
+except ImportError:
+    ANOMALY_ALPHA, ANOMALY_WARMUP_DAYS, ANOMALY_Z_THRESHOLD = 0.1, 14, 3.0
+
+STATE_TABLE = "anomaly_state"
+CHECKPOINT_TABLE = "anomaly_checkpoint"
+SEASONAL_ALPHA = 0.2
+SEASONAL_MIN_SAMPLES = 3  # weeks of a weekday before its seasonal mean replaces the EWMA baseline
+MAX_GAP_DAYS = 400  # idle gaps longer than this are skipped instead of closed day by day
+CHECKPOINT_SECONDS = 30.0
+
+
+def _as_day(value) -> date:
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    return _as_datetime(value).date()
+
+
+class DailyDetector:
+    """
+    EWMA mean of one stream's daily counts with a day-of-week seasonal mean, and an
+    EWMA variance of the residuals against that baseline.
+    Counts accumulate into the open day; a completed day is scored against the
+    baseline before it is folded in. Events older than the open day are ignored.
+    """
+
+    def __init__(self, alpha: float = ANOMALY_ALPHA, warmup_days: int = ANOMALY_WARMUP_DAYS):
+        self.alpha = alpha
+        self.warmup_days = warmup_days
+        self.day = None
+        self.count = 0
+        self.days = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.seasonal = [0.0] * 7
+        self.seasonal_n = [0] * 7
+        self.last = None  # {"day", "observed", "expected", "z"} of the latest scored day
+
+    def add(self, day: date, amount: int = 1) -> bool:
+        """Count amount events on day; False if day is already closed."""
+        if self.day is None:
+            self.day = day
+        if day < self.day:
+            return False
+        self.advance_to(day)
+        self.count += amount
+        return True
+
+    def advance_to(self, day: date):
+        """Close every day before day (days without events count as zero)."""
+        if self.day is None or day <= self.day:
+            return
+        if (day - self.day).days > MAX_GAP_DAYS:
+            self._close()
+            self.day = day
+            return
+        while self.day < day:
+            self._close()
+
+    def expected(self, weekday: int) -> float:
+        if self.seasonal_n[weekday] >= SEASONAL_MIN_SAMPLES:
+            return self.seasonal[weekday]
+        return self.mean
+
+    def std(self, expected: float) -> float:
+        # Poisson floor: low-volume streams should not alert on a single extra ticket.
+        return math.sqrt(max(self.var, expected, 1.0))
+
+    def z_score(self, observed: float, weekday: int):
+        """(expected, z) for a day's count; z is None while warming up."""
+        expected = self.expected(weekday)
+        if self.days < self.warmup_days:
+            return expected, None
+        return expected, (observed - expected) / self.std(expected)
+
+    def _close(self):
+        x, weekday = self.count, self.day.weekday()
+        expected, z = self.z_score(x, weekday)
+        self.last = {"day": self.day.isoformat(), "observed": x, "expected": expected, "z": z}
+        if self.days == 0:
+            self.mean = float(x)
+        else:
+            self.mean += self.alpha * (x - self.mean)
+            # Variance of the residual against the (seasonal) baseline, not of raw counts,
+            # so a regular weekly pattern does not widen the band.
+            self.var = (1 - self.alpha) * self.var + self.alpha * (x - expected) ** 2
+        if self.seasonal_n[weekday] == 0:
+            self.seasonal[weekday] = float(x)
+        else:
+            self.seasonal[weekday] += SEASONAL_ALPHA * (x - self.seasonal[weekday])
+        self.seasonal_n[weekday] += 1
+        self.days += 1
+        self.count = 0
+        self.day += timedelta(days=1)
+
+    def to_dict(self) -> dict:
+        return {
+            "day": self.day.isoformat() if self.day else None,
+            "count": self.count,
+            "days": self.days,
+            "mean": self.mean,
+            "var": self.var,
+            "seasonal": self.seasonal,
+            "seasonal_n": self.seasonal_n,
+            "last": self.last,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict, alpha: float = ANOMALY_ALPHA, warmup_days: int = ANOMALY_WARMUP_DAYS):
+        detector = cls(alpha, warmup_days)
+        detector.day = date.fromisoformat(state["day"]) if state["day"] else None
+        for key in ("count", "days", "mean", "var", "seasonal", "seasonal_n", "last"):
+            setattr(detector, key, state[key])
+        return detector
+
+
+class AnomalyMonitor:
+    """
+    Detectors for every (metric, dimension, value) stream of one database.
+    volume counts tickets on their created_at day; sla_breach counts tickets
+    resolved after their sla_deadline, on their resolved_at day.
+    """
+
+    def __init__(self, db, alpha: float = ANOMALY_ALPHA, warmup_days: int = ANOMALY_WARMUP_DAYS,
+                 threshold: float = ANOMALY_Z_THRESHOLD):
+        self.db = db
+        self.alpha = alpha
+        self.warmup_days = warmup_days
+        self.threshold = threshold
+        self.detectors = {}
+        self.last_ticket_id = 0
+        self.last_breach_seq = None  # None until the history has been replayed
+        self._dirty = set()
+        self._saved_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    # --- State ----------------------------------------------------------------
+
+    def load(self):
+        """Restore the checkpoint, then replay tickets created or breached since it."""
+        conn = self.db.connect()
+        try:
+            self._create_schema(conn)
+            conn.commit()
+            with self._lock:
+                for metric, dimension, value, state in conn.execute(
+                    f"SELECT metric, dimension, value, state FROM {STATE_TABLE}"
+                ):
+                    self.detectors[(metric, dimension, value)] = DailyDetector.from_dict(
+                        json.loads(state), self.alpha, self.warmup_days
+                    )
+                row = conn.execute(f"SELECT last_ticket_id, last_breach_seq FROM {CHECKPOINT_TABLE}").fetchone()
+                if row:
+                    self.last_ticket_id, self.last_breach_seq = row
+        finally:
+            conn.close()
+        self.catch_up()
+        self.save()
+        return self
+
+    def _create_schema(self, conn):
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+                metric TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                value TEXT NOT NULL,
+                state TEXT NOT NULL,
+                PRIMARY KEY (metric, dimension, value)
+            )
+        """)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                last_ticket_id INTEGER NOT NULL,
+                last_breach_seq INTEGER
+            )
+        """)
+
+    def catch_up(self):
+        """
+        Count tickets created past last_ticket_id and breaches logged past last_breach_seq.
+        Both marks follow commit order and both queries are primary-key seeks, so the cost
+        follows the number of new rows; only the first load reads the whole history.
+        """
+        with self._lock, self.db._reading() as conn, tracer.span("anomaly.catch_up"):
+            conn.execute("BEGIN")  # one snapshot: the history replay and the log mark must agree
+            try:
+                source = self.db._ticket_source(conn)
+                created = (
+                    TicketQuery(source)
+                    .dimension("ticket_id").dimension("created_at").dimension("category").dimension("priority")
+                    .where("ticket_id", self.last_ticket_id, ">")
+                )
+                if self.last_ticket_id:
+                    created.order_by("ticket_id")  # ids follow commit order
+                else:
+                    created.order_by("created_at", "ticket_id")  # first load: replay history by day
+                for ticket_id, created_at, category, priority in tracer.execute_sql(conn, *created.build()):
+                    self._observe("volume", created_at, category, priority)
+                    self.last_ticket_id = max(self.last_ticket_id, ticket_id)
+                if self.last_breach_seq is None:
+                    self._replay_breaches(conn, source)
+                logged = (
+                    TicketQuery(BREACH_LOG)
+                    .dimension("seq").dimension("resolved_at").dimension("category").dimension("priority")
+                    .where("seq", self.last_breach_seq, ">")
+                    .order_by("seq")
+                    .build()
+                )
+                for seq, resolved_at, category, priority in tracer.execute_sql(conn, *logged):
+                    self._observe("sla_breach", resolved_at, category, priority)
+                    self.last_breach_seq = seq
+            finally:
+                conn.rollback()
+
+    def _replay_breaches(self, conn, source):
+        """First load: count every breach already in the tickets, then follow the log from its end."""
+        (self.last_breach_seq,) = conn.execute(f"SELECT COALESCE(MAX(seq), 0) FROM {BREACH_LOG}").fetchone()
+        breached = (
+            TicketQuery(source)
+            .dimension("resolved_at").dimension("category").dimension("priority")
+            .where_sql("resolved_at > sla_deadline")
+            .order_by("resolved_at")
+            .build()
+        )
+        for resolved_at, category, priority in tracer.execute_sql(conn, *breached):
+            self._observe("sla_breach", resolved_at, category, priority)
+
+    def save(self, force: bool = True):
+        """Checkpoint changed detectors and the high-water marks in one transaction."""
+        with self._lock:
+            if not force and time.monotonic() - self._saved_at < CHECKPOINT_SECONDS:
+                return
+            rows = [(*key, json.dumps(self.detectors[key].to_dict())) for key in self._dirty]
+            checkpoint = (self.last_ticket_id, self.last_breach_seq)
+            self._dirty = set()
+            self._saved_at = time.monotonic()
+        conn = self.db.connect()
+        try:
+            with conn:
+                conn.executemany(f"INSERT OR REPLACE INTO {STATE_TABLE} VALUES (?, ?, ?, ?)", rows)
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {CHECKPOINT_TABLE} (id, last_ticket_id, last_breach_seq) VALUES (1, ?, ?)",
+                    checkpoint,
+                )
+        finally:
+            conn.close()
+
+    # --- Incremental updates ----------------------------------------------------
+
+    def _observe(self, metric, moment, category, priority):
+        # Future-dated rows (clock skew, imports) count as today instead of closing days early.
+        day = min(_as_day(moment), date.today())
+        for key in ((metric, "all", "*"), (metric, "category", category), (metric, "priority", priority)):
+            detector = self.detectors.get(key)
+            if detector is None:
+                detector = self.detectors[key] = DailyDetector(self.alpha, self.warmup_days)
+            if detector.add(day):
+                self._dirty.add(key)
+
+    def on_writes(self, applied):
+        """TicketWriter listener: catch up after every batch that created or resolved tickets."""
+        if any(op == "create" or (op == "update" and result and args[1].get("resolved_at"))
+               for op, args, result in applied):
+            self.catch_up()
+            self.save(force=False)
+
+    # --- Answers ---------------------------------------------------------------------
+
+    def report(self, analysis=None, today: date = None) -> dict:
+        """
+        Streams whose latest completed day, or today so far, is more than threshold
+        standard deviations from baseline (only spikes for sla_breach). Catches up on
+        rows written since the last batch, then reads detector state only: cost depends
+        on the number of streams and new tickets, not the history.
+        """
+        self.catch_up()
+        analysis = analysis or {}
+        today = today or date.today()
+        filters = {d: analysis[d] for d in ("category", "priority") if analysis.get(d)}
+        anomalies = []
+        with self._lock:
+            for key in sorted(self.detectors, key=lambda k: tuple(map(str, k))):
+                metric, dimension, value = key
+                if filters and filters.get(dimension) != value:
+                    continue
+                detector = self.detectors[key]
+                if detector.day is not None and detector.day < today:
+                    detector.advance_to(today)
+                    self._dirty.add(key)
+                anomalies += self._stream_anomalies(key, detector, today)
+        anomalies.sort(key=lambda a: -abs(a["z"]))
+        return {
+            "query_type": "anomaly",
+            "as_of": today.isoformat(),
+            "threshold": self.threshold,
+            "streams_checked": len(self.detectors),
+            "anomalies": anomalies,
+        }
+
+    def _stream_anomalies(self, key, detector, today):
+        metric, dimension, value = key
+        found = []
+        candidates = []
+        if detector.last and detector.last["z"] is not None:
+            candidates.append((detector.last["day"], detector.last["observed"], detector.last["expected"],
+                               detector.last["z"], False))
+        if detector.day == today:
+            # A partial day can only be judged high: the count still grows until midnight.
+            expected, z = detector.z_score(detector.count, today.weekday())
+            if z is not None and z >= self.threshold:
+                candidates.append((today.isoformat(), detector.count, expected, z, True))
+        for day, observed, expected, z, in_progress in candidates:
+            if z >= self.threshold or (metric == "volume" and z <= -self.threshold and not in_progress):
+                found.append({
+                    "metric": metric,
+                    "dimension": dimension,
+                    "value": value,
+                    "day": day,
+                    "observed": observed,
+                    "expected": round(expected, 2),
+                    "z": round(z, 2),
+                    "direction": "spike" if z > 0 else "drop",
+                    "in_progress": in_progress,
+                })
+        return found
@@ -3,13 +3,124 @@ Database operations: schema creation, connections, and query execution.
 Uses only sqlite3 (no pandas) so database_setup works with minimal dependencies.
 """
 import sqlite3
+import threading
+import uuid
+import zlib
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from database.query_builder import TicketQuery, union_all
+from utils.tracing import tracer
+
 try:
-    from config import DATABASE_PATH
+    from config import ARCHIVE_AFTER_DAYS, DATABASE_PATH, TICKET_PARTITIONING, WRITER_MAX_BATCH, \
+        WRITER_MAX_LATENCY_MS, WRITER_MAX_QUEUE, SQLITE_CACHED_STATEMENTS, SQLITE_READ_POOL_SIZE
 except ImportError:
     DATABASE_PATH = Path(__file__).resolve().parent.parent / "data" / "support_tickets.db"
+    TICKET_PARTITIONING = False
+    ARCHIVE_AFTER_DAYS = 180
+    WRITER_MAX_QUEUE, WRITER_MAX_BATCH, WRITER_MAX_LATENCY_MS = 10000, 500, 10.0
+    SQLITE_CACHED_STATEMENTS = 256
+    SQLITE_READ_POOL_SIZE = 8
+
+TICKET_COLUMNS = [
+    "title", "description", "status", "priority", "category",
+    "assignee", "created_at", "updated_at", "resolved_at",
+    "sla_deadline", "customer_name", "customer_email",
+]
+PARTITION_REGISTRY = "ticket_partitions"
+# Analysis keys applied as filters per query type (others only honour category/assignee).
+COUNT_FILTERS = ("status", "priority", "category", "assignee")
+LIST_FILTERS = COUNT_FILTERS
+LIST_COLUMNS = [
+    "ticket_id", "title", "status", "priority", "category",
+    "assignee", "created_at", "resolved_at", "sla_deadline",
+]
+# Every column but description: what aggregate and list reads select from unions over the archive.
+SUMMARY_COLUMNS = ["ticket_id"] + [c for c in TICKET_COLUMNS if c != "description"]
+
+# Cold storage for resolved tickets (see DBManager.archive_resolved)
+ARCHIVE_TABLE = "tickets_archive"
+ARCHIVE_VIEW = "tickets_archived"
+ARCHIVE_DETAIL_VIEW = "tickets_archived_detail"
+# Hot tickets plus the archive, so reads keep one SQL text whether or not they reach archived rows.
+ALL_VIEW = "tickets_all"
+ALL_DETAIL_VIEW = "tickets_all_detail"
+HISTORY_TABLE = "ticket_history_agg"
+CODED_COLUMNS = ["status", "priority", "category", "assignee", "customer_name", "customer_email"]
+# SLA-breaching resolutions in commit order (seq), written with the ticket change itself.
+BREACH_LOG = "sla_breach_log"
+ARCHIVABLE = "status IN ('Resolved', 'Closed') AND resolved_at IS NOT NULL AND resolved_at < ?"
+
+
+def _tickets_ddl(table, autoincrement=True):
+    """CREATE TABLE statement for the tickets schema (plain table or monthly partition)."""
+    pk = "INTEGER PRIMARY KEY AUTOINCREMENT" if autoincrement else "INTEGER PRIMARY KEY"
+    return f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            ticket_id {pk},
+            title TEXT NOT NULL,
+            description TEXT,
+            status TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            category TEXT NOT NULL,
+            assignee TEXT,
+            created_at TIMESTAMP NOT NULL,
+            updated_at TIMESTAMP NOT NULL,
+            resolved_at TIMESTAMP,
+            sla_deadline TIMESTAMP,
+            customer_name TEXT,
+            customer_email TEXT
+        )
+    """
+
+
+def _as_datetime(value):
+    """datetime from a datetime or a sqlite TIMESTAMP string."""
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def _month_bounds(moment):
+    """(start, end) datetimes of the calendar month containing moment."""
+    start = datetime(moment.year, moment.month, 1)
+    end = datetime(moment.year + (moment.month == 12), moment.month % 12 + 1, 1)
+    return start, end
+
+
+def _partition_name(month_start):
+    return f"tickets_p{month_start:%Y_%m}"
+
+
+def _zip_text(text):
+    return None if text is None else zlib.compress(text.encode("utf-8"), 9)
+
+
+def _unzip_text(blob):
+    return None if blob is None else zlib.decompress(blob).decode("utf-8")
+
+
+def _cutoff(time_filter):
+    if not time_filter or "days" not in time_filter:
+        return None
+    return datetime.now() - timedelta(days=time_filter["days"])
+
+
+# One group-commit writer per database file, shared by every DBManager in the process.
+_writers = {}
+_writers_lock = threading.Lock()
+# Databases whose indexes were brought up to date by connect() in this process.
+_upgraded = set()
+_upgraded_lock = threading.Lock()
+# Idle read connections (DBManager._reading), keyed by database path and shared across threads.
+_read_pools = {}
+_read_pools_lock = threading.Lock()
+
+# One anomaly monitor per database file, fed by that file's writer.
+_monitors = {}
+_monitors_lock = threading.Lock()
 
 
 def _rows_to_dicts(cursor):
@@ -18,84 +129,695 @@ def _rows_to_dicts(cursor):
     return [dict(zip(cols, row)) for row in cursor.fetchall()]
 
 
+def _iter_dicts(cursor, chunk_size=1000):
+    """Yield row dicts, fetching chunk_size rows at a time (never materializes the result)."""
+    cols = [d[0] for d in cursor.description] if cursor.description else []
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        for row in rows:
+            yield dict(zip(cols, row))
+
+
 class DBManager:
     """Database operations and query execution for IT support tickets."""
 
-    def __init__(self, db_path=None):
+    def __init__(self, db_path=None, partitioned=None):
         self.db_path = db_path or DATABASE_PATH
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.partitioned = TICKET_PARTITIONING if partitioned is None else partitioned
         self._conn = None
 
-    def connect(self):
-        """Create database connection."""
-        return sqlite3.connect(str(self.db_path))
+    def connect(self, check_same_thread=True):
+        """Create database connection (with the zip_text/unzip_text functions used by the archive)."""
+        conn = sqlite3.connect(
+            str(self.db_path), cached_statements=SQLITE_CACHED_STATEMENTS, check_same_thread=check_same_thread,
+        )
+        conn.create_function("zip_text", 1, _zip_text, deterministic=True)
+        conn.create_function("unzip_text", 1, _unzip_text, deterministic=True)
+        key = str(Path(self.db_path).resolve())
+        if key not in _upgraded:
+            with _upgraded_lock:
+                if key not in _upgraded:
+                    self._upgrade_schema(conn)
+                    conn.commit()
+                    _upgraded.add(key)
+        return conn
+
+    def _upgrade_schema(self, conn):
+        """Create indexes and tables missing from databases built by older versions (idempotent)."""
+        kind = conn.execute("SELECT type FROM sqlite_master WHERE name = 'tickets'").fetchone()
+        if kind and kind[0] == "table":
+            # Serves keyset pagination (ORDER BY created_at, ticket_id) and time filters.
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tickets_created_at ON tickets(created_at, ticket_id)")
+        if kind:
+            self._create_breach_log(conn)
+
+    def _create_breach_log(self, conn):
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {BREACH_LOG} (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                ticket_id INTEGER NOT NULL,
+                resolved_at TIMESTAMP NOT NULL,
+                category TEXT NOT NULL,
+                priority TEXT NOT NULL
+            )
+        """)
 
     def create_tables(self):
-        """Create the tickets table if it does not exist."""
+        """
+        Create the tickets table if it does not exist. With partitioning enabled, tickets
+        is a view over monthly partition tables; an existing plain table is migrated.
+        """
         conn = self.connect()
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS tickets (
-                ticket_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        try:
+            if not self.partitioned:
+                conn.execute(_tickets_ddl("tickets"))
+                self._upgrade_schema(conn)
+            else:
+                self._create_partitioned_schema(conn)
+                self._create_breach_log(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    # --- Monthly partitions -------------------------------------------------
+
+    def _create_partitioned_schema(self, conn):
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {PARTITION_REGISTRY} (
+                name TEXT PRIMARY KEY,
+                month_start TIMESTAMP NOT NULL,
+                month_end TIMESTAMP NOT NULL
+            )
+        """)
+        conn.execute("CREATE TABLE IF NOT EXISTS ticket_id_seq (id INTEGER PRIMARY KEY CHECK (id = 1), value INTEGER NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO ticket_id_seq (id, value) VALUES (1, 0)")
+        kind = conn.execute("SELECT type FROM sqlite_master WHERE name = 'tickets'").fetchone()
+        if kind and kind[0] == "table":
+            self._migrate_to_partitions(conn)
+        elif not kind:
+            self._rebuild_tickets_view(conn)
+
+    def _migrate_to_partitions(self, conn):
+        """Move rows of a plain tickets table into monthly partitions (ids preserved)."""
+        # RENAME would rewrite views over tickets to point at the table about to be dropped.
+        archived = self._drop_all_views(conn)
+        conn.execute("ALTER TABLE tickets RENAME TO tickets_unpartitioned")
+        cols = ", ".join(["ticket_id"] + TICKET_COLUMNS)
+        months = conn.execute(
+            "SELECT DISTINCT strftime('%Y-%m-01', created_at) FROM tickets_unpartitioned"
+        ).fetchall()
+        for (month,) in months:
+            start, end = _month_bounds(datetime.fromisoformat(month))
+            name = self._ensure_partition(conn, start, rebuild_view=False)
+            conn.execute(
+                f"INSERT INTO {name} ({cols}) SELECT {cols} FROM tickets_unpartitioned "
+                "WHERE created_at >= ? AND created_at < ?",
+                (start, end),
+            )
+        # Never reuse an id: AUTOINCREMENT's high-water mark and archived ids count too.
+        seen = [
+            "SELECT COALESCE(MAX(ticket_id), 0) FROM tickets_unpartitioned",
+            "SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'tickets'",
+        ]
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (ARCHIVE_TABLE,)).fetchone():
+            seen.append(f"SELECT COALESCE(MAX(ticket_id), 0) FROM {ARCHIVE_TABLE}")
+        conn.execute(f"UPDATE ticket_id_seq SET value = MAX(value, {', '.join(f'({q})' for q in seen)})")
+        conn.execute("DROP TABLE tickets_unpartitioned")
+        self._rebuild_tickets_view(conn)
+        if archived:
+            self._create_all_views(conn)
+
+    def _ensure_partition(self, conn, month_start, rebuild_view=True):
+        """Create the partition for month_start if missing; return its table name."""
+        name = _partition_name(month_start)
+        exists = conn.execute(f"SELECT 1 FROM {PARTITION_REGISTRY} WHERE name = ?", (name,)).fetchone()
+        if not exists:
+            _, month_end = _month_bounds(month_start)
+            conn.execute(_tickets_ddl(name, autoincrement=False))
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_created_at ON {name}(created_at)")
+            conn.execute(
+                f"INSERT INTO {PARTITION_REGISTRY} (name, month_start, month_end) VALUES (?, ?, ?)",
+                (name, month_start, month_end),
+            )
+            if rebuild_view:
+                self._rebuild_tickets_view(conn)
+        return name
+
+    def _rebuild_tickets_view(self, conn):
+        """Recreate the tickets view as UNION ALL of every partition."""
+        names = [r[0] for r in conn.execute(f"SELECT name FROM {PARTITION_REGISTRY} ORDER BY month_start")]
+        conn.execute("DROP VIEW IF EXISTS tickets")
+        if names:
+            body = " UNION ALL ".join(f"SELECT * FROM {n}" for n in names)
+        else:
+            body = "SELECT " + ", ".join(f"NULL AS {c}" for c in ["ticket_id"] + TICKET_COLUMNS) + " WHERE 0"
+        conn.execute(f"CREATE VIEW tickets AS {body}")
+
+    def _partitions(self, conn):
+        """[(name, month_start, month_end)] oldest first; None when tickets is a plain table."""
+        try:
+            rows = conn.execute(
+                f"SELECT name, month_start, month_end FROM {PARTITION_REGISTRY} ORDER BY month_start"
+            ).fetchall()
+        except sqlite3.OperationalError:
+            return None
+        return [(name, _as_datetime(start), _as_datetime(end)) for name, start, end in rows]
+
+    def _ticket_tables(self, conn):
+        """Physical tables holding hot tickets: every partition, or the plain tickets table."""
+        partitions = self._partitions(conn)
+        return ["tickets"] if partitions is None else [name for name, _, _ in partitions]
+
+    def _ticket_source(self, conn, cutoff=None, include_archive=True, detail=False):
+        """
+        FROM-clause relation for tickets created at or after cutoff: only the partitions
+        overlapping the window, plus the archive only when archived tickets fall inside it.
+        Windows covering every partition read the fixed tickets / tickets_all views; pruned
+        ones list their partitions in month order, so each partition set has one SQL text.
+        Only detail reads decompress archived descriptions.
+        """
+        partitions = self._partitions(conn)
+        names = None  # every hot partition
+        if partitions and cutoff is not None:
+            overlapping = [name for name, _, end in partitions if end > cutoff]
+            if len(overlapping) < len(partitions):
+                names = overlapping
+        archived = include_archive and self._archive_reaches(conn, cutoff)
+        if names is None:
+            if archived:
+                return ALL_DETAIL_VIEW if detail else ALL_VIEW
+            return "tickets"
+        if archived:
+            names = names + [ARCHIVE_DETAIL_VIEW if detail else ARCHIVE_VIEW]
+        cols = ", ".join(["ticket_id"] + TICKET_COLUMNS if detail else SUMMARY_COLUMNS)
+        if not names:
+            return f"(SELECT {cols} FROM tickets WHERE 0) AS tickets"
+        return "(" + " UNION ALL ".join(f"SELECT {cols} FROM {n}" for n in names) + ") AS tickets"
+
+    # --- Hot/cold archive ---------------------------------------------------
+
+    def _create_archive_schema(self, conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS archive_codes (
+                code INTEGER PRIMARY KEY,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                UNIQUE (kind, value)
+            )
+        """)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} (
+                ticket_id INTEGER PRIMARY KEY,
                 title TEXT NOT NULL,
-                description TEXT,
-                status TEXT NOT NULL,
-                priority TEXT NOT NULL,
-                category TEXT NOT NULL,
-                assignee TEXT,
+                description_z BLOB,
+                status_code INTEGER NOT NULL,
+                priority_code INTEGER NOT NULL,
+                category_code INTEGER NOT NULL,
+                assignee_code INTEGER,
                 created_at TIMESTAMP NOT NULL,
                 updated_at TIMESTAMP NOT NULL,
                 resolved_at TIMESTAMP,
                 sla_deadline TIMESTAMP,
-                customer_name TEXT,
-                customer_email TEXT
+                customer_name_code INTEGER,
+                customer_email_code INTEGER
             )
         """)
-        conn.commit()
-        conn.close()
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{ARCHIVE_TABLE}_created_at ON {ARCHIVE_TABLE}(created_at)")
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {HISTORY_TABLE} (
+                day DATE NOT NULL,
+                priority TEXT NOT NULL,
+                category TEXT NOT NULL,
+                status TEXT NOT NULL,
+                resolved INTEGER NOT NULL,
+                resolution_hours REAL NOT NULL,
+                PRIMARY KEY (day, priority, category, status)
+            )
+        """)
+        joins = " ".join(
+            f"{'JOIN' if c in ('status', 'priority', 'category') else 'LEFT JOIN'} archive_codes {c} ON {c}.code = a.{c}_code"
+            for c in CODED_COLUMNS
+        )
+        decoded = {
+            "description": "unzip_text(a.description_z)",
+            **{c: f"{c}.value" for c in CODED_COLUMNS},
+        }
+        for view, cols in ((ARCHIVE_VIEW, SUMMARY_COLUMNS), (ARCHIVE_DETAIL_VIEW, ["ticket_id"] + TICKET_COLUMNS)):
+            select = ", ".join(f"{decoded[c]} AS {c}" if c in decoded else f"a.{c}" for c in cols)
+            conn.execute(f"CREATE VIEW IF NOT EXISTS {view} AS SELECT {select} FROM {ARCHIVE_TABLE} a {joins}")
+        self._create_all_views(conn)
+
+    def _create_all_views(self, conn):
+        """(Re)create the hot + archive union views read by _ticket_source."""
+        self._drop_all_views(conn)
+        for view, archive, cols in (
+            (ALL_VIEW, ARCHIVE_VIEW, SUMMARY_COLUMNS),
+            (ALL_DETAIL_VIEW, ARCHIVE_DETAIL_VIEW, ["ticket_id"] + TICKET_COLUMNS),
+        ):
+            select = ", ".join(cols)
+            conn.execute(f"CREATE VIEW {view} AS SELECT {select} FROM tickets UNION ALL SELECT {select} FROM {archive}")
+
+    def _drop_all_views(self, conn):
+        """Drop the union views; True if they existed."""
+        existed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (ALL_VIEW,)).fetchone()
+        for view in (ALL_VIEW, ALL_DETAIL_VIEW):
+            conn.execute(f"DROP VIEW IF EXISTS {view}")
+        return existed is not None
+
+    def _archive_reaches(self, conn, cutoff=None):
+        """True if an archived ticket was created at or after cutoff (any archived ticket if cutoff is None)."""
+        try:
+            (latest,) = conn.execute(f"SELECT MAX(created_at) FROM {ARCHIVE_TABLE}").fetchone()
+        except sqlite3.OperationalError:
+            return False
+        if latest is None:
+            return False
+        return cutoff is None or _as_datetime(latest) >= cutoff
+
+    def archive_resolved(self, older_than_days=ARCHIVE_AFTER_DAYS):
+        """
+        Move Resolved/Closed tickets resolved more than older_than_days ago into the
+        compressed archive and fold them into the daily history aggregates.
+        Returns the number of tickets archived.
+        """
+        cutoff = datetime.now() - timedelta(days=older_than_days)
+        conn = self.connect()
+        try:
+            self._create_archive_schema(conn)
+            conn.commit()
+            moved = 0
+            for table in self._ticket_tables(conn):
+                with conn:
+                    moved += self._archive_table(conn, table, cutoff)
+            return moved
+        finally:
+            conn.close()
+
+    def _archive_table(self, conn, table, cutoff):
+        for col in CODED_COLUMNS:
+            conn.execute(
+                f"INSERT OR IGNORE INTO archive_codes (kind, value) "
+                f"SELECT DISTINCT '{col}', {col} FROM {table} WHERE {ARCHIVABLE} AND {col} IS NOT NULL",
+                (cutoff,),
+            )
+        coded = ", ".join(
+            f"(SELECT code FROM archive_codes WHERE kind = '{col}' AND value = t.{col})" for col in CODED_COLUMNS
+        )
+        conn.execute(
+            f"""
+            INSERT INTO {ARCHIVE_TABLE} (
+                ticket_id, title, description_z,
+                {", ".join(f"{col}_code" for col in CODED_COLUMNS)},
+                created_at, updated_at, resolved_at, sla_deadline
+            )
+            SELECT t.ticket_id, t.title, zip_text(t.description), {coded},
+                   t.created_at, t.updated_at, t.resolved_at, t.sla_deadline
+            FROM {table} t
+            WHERE {ARCHIVABLE}
+            """,
+            (cutoff,),
+        )
+        conn.execute(
+            f"""
+            INSERT INTO {HISTORY_TABLE} (
+                day, priority, category, status, resolved, resolution_hours
+            )
+            SELECT
+                DATE(created_at), priority, category, status,
+                COUNT(resolved_at),
+                SUM((JULIANDAY(resolved_at) - JULIANDAY(created_at)) * 24)
+            FROM {table}
+            WHERE {ARCHIVABLE}
+            GROUP BY DATE(created_at), priority, category, status
+            ON CONFLICT (day, priority, category, status) DO UPDATE SET
+                resolved = resolved + excluded.resolved,
+                resolution_hours = resolution_hours + excluded.resolution_hours
+            """,
+            (cutoff,),
+        )
+        return conn.execute(f"DELETE FROM {table} WHERE {ARCHIVABLE}", (cutoff,)).rowcount
+
+    def _resolved_rows_query(self, conn, analysis, cutoff=None):
+        """
+        (sql, params) yielding priority, category, n, hours for resolved tickets in the window:
+        hot rows, plus archived tickets from the pre-aggregated daily history (raw archived
+        rows for the partial cutoff day, or for the whole window when filtering by assignee,
+        which the history does not keep).
+        """
+        hours = "(JULIANDAY(resolved_at) - JULIANDAY(created_at)) * 24"
+
+        def rows(source):
+            q = self._filtered(TicketQuery(source), analysis).since(cutoff).where_sql("resolved_at IS NOT NULL")
+            return q.dimension("priority").dimension("category").dimension("1", "n").dimension(hours, "hours")
+
+        hot = rows(self._ticket_source(conn, include_archive=False))
+        if analysis.get("assignee"):
+            return union_all(hot, rows(ARCHIVE_VIEW))
+        history = (
+            TicketQuery(HISTORY_TABLE)
+            .dimension("priority").dimension("category")
+            .dimension("resolved", "n").dimension("resolution_hours", "hours")
+            .where_sql("resolved > 0")
+            .where("category", analysis.get("category"))
+        )
+        if cutoff is None:
+            return union_all(hot, history)
+        history.where_sql("day > DATE(?)", cutoff)
+        cutoff_day = rows(ARCHIVE_VIEW).where_sql("created_at < DATE(?, '+1 day')", cutoff)
+        return union_all(hot, history, cutoff_day)
+
+    def insert_tickets(self, rows, conn=None):
+        """
+        Insert ticket dicts (keys from TICKET_COLUMNS) and return their ticket_ids.
+        Partitioned databases route each row to its created_at month, creating partitions as needed.
+        Pass conn to insert inside a caller-managed transaction.
+        """
+        own = conn is None
+        conn = conn or self.connect()
+        try:
+            cols = ", ".join(TICKET_COLUMNS)
+            marks = ", ".join("?" for _ in TICKET_COLUMNS)
+            ids = []
+            rows = list(rows)
+            partitions = self._partitions(conn)
+            if partitions is None:
+                for row in rows:
+                    cur = conn.execute(
+                        f"INSERT INTO tickets ({cols}) VALUES ({marks})",
+                        [row.get(c) for c in TICKET_COLUMNS],
+                    )
+                    ids.append(cur.lastrowid)
+            else:
+                (last,) = conn.execute(
+                    "UPDATE ticket_id_seq SET value = value + ? RETURNING value", (len(rows),)
+                ).fetchone()
+                known = {name for name, _, _ in partitions}
+                for ticket_id, row in zip(range(last - len(rows) + 1, last + 1), rows):
+                    month_start, _ = _month_bounds(_as_datetime(row["created_at"]))
+                    name = _partition_name(month_start)
+                    if name not in known:
+                        self._ensure_partition(conn, month_start)
+                        known.add(name)
+                    conn.execute(
+                        f"INSERT INTO {name} (ticket_id, {cols}) VALUES (?, {marks})",
+                        [ticket_id] + [row.get(c) for c in TICKET_COLUMNS],
+                    )
+                    ids.append(ticket_id)
+            self._log_breaches(conn, [
+                (ticket_id, row["resolved_at"], row["category"], row["priority"])
+                for ticket_id, row in zip(ids, rows)
+                if row.get("resolved_at") and row.get("sla_deadline")
+                and _as_datetime(row["resolved_at"]) > _as_datetime(row["sla_deadline"])
+            ])
+            if own:
+                conn.commit()
+            return ids
+        finally:
+            if own:
+                conn.close()
+
+    def _log_breaches(self, conn, breaches):
+        """Append (ticket_id, resolved_at, category, priority) SLA breaches to the log in conn's transaction."""
+        if breaches:
+            conn.executemany(
+                f"INSERT INTO {BREACH_LOG} (ticket_id, resolved_at, category, priority) VALUES (?, ?, ?, ?)",
+                breaches,
+            )
+
+    # --- Write path (group commit) --------------------------------------------
+
+    @property
+    def writer(self):
+        """The process-wide TicketWriter for this database (started on first use)."""
+        from database.writer import TicketWriter
+        key = str(Path(self.db_path).resolve())
+        with _writers_lock:
+            if key not in _writers:
+                _writers[key] = TicketWriter(
+                    self, max_queue=WRITER_MAX_QUEUE, max_batch=WRITER_MAX_BATCH,
+                    max_latency_ms=WRITER_MAX_LATENCY_MS,
+                )
+            return _writers[key]
+
+    @property
+    def anomaly_monitor(self):
+        """The process-wide AnomalyMonitor for this database (restored and hooked to the writer on first use)."""
+        from database.anomaly import AnomalyMonitor
+        key = str(Path(self.db_path).resolve())
+        with _monitors_lock:
+            if key not in _monitors:
+                monitor = _monitors[key] = AnomalyMonitor(self).load()
+                # Hooked after load: catch-ups resume from the high-water marks, so nothing is missed.
+                self.writer.listeners.append(monitor.on_writes)
+            return _monitors[key]
+
+    def create_ticket(self, **fields):
+        """Queue a new ticket; the returned Future resolves to its ticket_id once committed."""
+        return self.writer.submit("create", fields)
+
+    def update_ticket(self, ticket_id, **changes):
+        """
+        Queue column changes for a ticket; the Future resolves to True if the ticket was
+        found, False if it does not exist, and raises ValueError if it is archived (read-only).
+        """
+        return self.writer.submit("update", ticket_id, changes)
+
+    def resolve_ticket(self, ticket_id, resolved_at=None, status="Resolved"):
+        """Queue resolution of a ticket (status Resolved/Closed, resolved_at defaults to now)."""
+        return self.writer.submit("update", ticket_id, {
+            "status": status,
+            "resolved_at": resolved_at or datetime.now(),
+        })
+
+    def _apply_write(self, conn, op, *args):
+        """Apply one queued write inside the writer's transaction."""
+        if op == "create":
+            return self._apply_create(conn, *args)
+        if op == "update":
+            return self._apply_update(conn, *args)
+        if op == "noop":
+            return None
+        raise ValueError(f"Unknown write operation: {op}")
+
+    def _apply_create(self, conn, fields):
+        from database.sample_data import SLA_HOURS
+        unknown = set(fields) - set(TICKET_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown ticket fields: {sorted(unknown)}")
+        now = datetime.now()
+        row = {"status": "Open", "priority": "Medium", "created_at": now, "updated_at": now, **fields}
+        if "sla_deadline" not in fields and row["priority"] in SLA_HOURS:
+            row["sla_deadline"] = _as_datetime(row["created_at"]) + timedelta(hours=SLA_HOURS[row["priority"]])
+        return self.insert_tickets([row], conn=conn)[0]
+
+    def _apply_update(self, conn, ticket_id, changes):
+        # created_at decides the partition, so it is immutable.
+        unknown = (set(changes) - set(TICKET_COLUMNS)) | ({"created_at"} & set(changes))
+        if unknown:
+            raise ValueError(f"Cannot update ticket fields: {sorted(unknown)}")
+        changes = {"updated_at": datetime.now(), **changes}
+        assignments = ", ".join(f"{col} = ?" for col in changes)
+        # Newest partition first: updates overwhelmingly target recent tickets.
+        for table in reversed(self._ticket_tables(conn)):
+            cur = conn.execute(
+                f"UPDATE {table} SET {assignments} WHERE ticket_id = ?",
+                list(changes.values()) + [ticket_id],
+            )
+            if cur.rowcount:
+                if "resolved_at" in changes:
+                    self._log_breaches(conn, conn.execute(
+                        f"SELECT ticket_id, resolved_at, category, priority FROM {table} "
+                        "WHERE ticket_id = ? AND resolved_at > sla_deadline",
+                        (ticket_id,),
+                    ).fetchall())
+                return True
+        if self._archive_reaches(conn) and \
+                conn.execute(f"SELECT 1 FROM {ARCHIVE_TABLE} WHERE ticket_id = ?", (ticket_id,)).fetchone():
+            raise ValueError(f"Ticket {ticket_id} is archived and read-only")
+        return False
+
+    @contextmanager
+    def _reading(self):
+        """
+        Borrow a long-lived read connection from the database's process-wide pool, so
+        prepared statements stay cached across threads and Streamlit reruns.
+        """
+        key = str(Path(self.db_path).resolve())
+        with _read_pools_lock:
+            idle = _read_pools.get(key)
+            conn = idle.pop() if idle else None
+        conn = conn or self.connect(check_same_thread=False)
+        try:
+            yield conn
+        finally:
+            with _read_pools_lock:
+                idle = _read_pools.setdefault(key, [])
+                if len(idle) < SQLITE_READ_POOL_SIZE:
+                    idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def close(self):
+        """Close the pooled idle read connections for the database."""
+        with _read_pools_lock:
+            idle = _read_pools.pop(str(Path(self.db_path).resolve()), [])
+        for conn in idle:
+            conn.close()
 
     def execute_query(self, analysis, time_cutoff=None):
         """
         Execute a query based on analysis dict from query_processor.
-        analysis: { type, status, priority, time_filter }
+        analysis: { type, status, priority, category, assignee, time_filter }
+        time_cutoff: earliest created_at to include (default: from time_filter, computed once per query).
+        """
+        if time_cutoff is None:
+            time_filter = analysis.get("time_filter")
+            if analysis["type"] == "trend":
+                time_filter = time_filter or {"days": 30}
+            time_cutoff = _cutoff(time_filter)
+        with tracer.span(f"db.query.{analysis['type']}"), self._reading() as conn:
+            return self._dispatch_query(conn, analysis, time_cutoff)
+
+    def _dispatch_query(self, conn, analysis, time_cutoff=None):
+        if analysis["type"] == "count":
+            return self._count_query(conn, analysis, time_cutoff)
+        if analysis["type"] == "trend":
+            return self._trend_query(conn, analysis, time_cutoff)
+        if analysis["type"] == "average":
+            return self._average_query(conn, analysis, time_cutoff)
+        if analysis["type"] == "sla":
+            return self._sla_query(conn, analysis, time_cutoff)
+        if analysis["type"] == "assignee":
+            return self._assignee_query(conn, analysis, time_cutoff)
+        if analysis["type"] == "performance":
+            return self._performance_query(conn, analysis, time_cutoff)
+        if analysis["type"] == "list":
+            return self._list_query(conn, analysis, time_cutoff)
+        if analysis["type"] == "anomaly":
+            return self.anomaly_monitor.report(analysis)
+        return self._general_query(conn, analysis, time_cutoff)
+
+    def _run(self, conn, query):
+        sql, params = query.build()
+        return _rows_to_dicts(tracer.execute_sql(conn, sql, params))
+
+    def _filtered(self, query, analysis, keys=("category", "assignee")):
+        """Apply analysis filters: exact match for status/priority/category, name prefix for assignee."""
+        for key in keys:
+            if key == "assignee":
+                query.where("assignee", f"{analysis['assignee']}%" if analysis.get("assignee") else None, "LIKE")
+            else:
+                query.where(key, analysis.get(key))
+        return query
+
+    def _base_query(self, conn, analysis, cutoff=None, keys=("category", "assignee")):
+        """TicketQuery over the window's partitions/archive with analysis filters and time range."""
+        query = TicketQuery(self._ticket_source(conn, cutoff)).since(cutoff)
+        return self._filtered(query, analysis, keys)
+
+    def list_tickets(self, analysis, after=None, page_size=50):
+        """
+        One page of tickets matching analysis, newest first. after: the previous
+        page's next_cursor ([created_at, ticket_id]) for keyset pagination.
         """
+        with tracer.span("db.query.list"), self._reading() as conn:
+            return self._list_query(conn, analysis, _cutoff(analysis.get("time_filter")), after, page_size)
+
+    def iter_tickets(self, analysis, chunk_size=1000):
+        """Stream every ticket matching analysis (newest first) as dicts, chunk_size rows per fetch."""
         conn = self.connect()
         try:
-            if analysis["type"] == "count":
-                return self._count_query(conn, analysis, time_cutoff)
-            if analysis["type"] == "trend":
-                return self._trend_query(conn, analysis, time_cutoff)
-            if analysis["type"] == "average":
-                return self._average_query(conn, analysis, time_cutoff)
-            if analysis["type"] == "sla":
-                return self._sla_query(conn, analysis, time_cutoff)
-            if analysis["type"] == "assignee":
-                return self._assignee_query(conn, analysis, time_cutoff)
-            if analysis["type"] == "performance":
-                return self._performance_query(conn, analysis, time_cutoff)
-            return self._general_query(conn, analysis, time_cutoff)
+            sql, params = self._list_sql(conn, analysis, _cutoff(analysis.get("time_filter"))).build()
+            cur = tracer.execute_sql(conn, sql, params)
+            try:
+                yield from _iter_dicts(cur, chunk_size)
+            finally:
+                cur.close()  # records the timing even if the consumer stops early
         finally:
             conn.close()
 
-    def _time_filter_sql(self, time_filter, params, prefix="created_at"):
-        if not time_filter or "days" not in time_filter:
-            return "", params
-        cutoff = datetime.now() - timedelta(days=time_filter["days"])
-        return f" AND {prefix} >= ?", params + [cutoff]
+    def _list_sql(self, conn, analysis, cutoff=None, after=None, limit=None):
+        query = self._base_query(conn, analysis, cutoff, LIST_FILTERS)
+        for col in LIST_COLUMNS:
+            query.dimension(col)
+        if after:
+            query.where_sql("(created_at, ticket_id) < (?, ?)", *after)
+        query.order_by("created_at DESC", "ticket_id DESC")
+        if limit:
+            query.limit(limit)
+        return query
+
+    def _list_query(self, conn, analysis, cutoff=None, after=None, page_size=50):
+        rows = self._run(conn, self._list_sql(conn, analysis, cutoff, after, page_size + 1))
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = [rows[-1]["created_at"], rows[-1]["ticket_id"]]
+        return {
+            "query_type": "list",
+            "tickets": rows,
+            "next_cursor": next_cursor,
+            "filters": analysis,
+        }
+
+    def identity(self):
+        """Random id stamped into the database on first use; a recreated file gets a new one."""
+        conn = self.connect()
+        try:
+            try:
+                row = conn.execute("SELECT value FROM db_meta WHERE key = 'identity'").fetchone()
+            except sqlite3.OperationalError:
+                row = None
+            if row is None:
+                conn.execute("CREATE TABLE IF NOT EXISTS db_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+                conn.execute("INSERT OR IGNORE INTO db_meta (key, value) VALUES ('identity', ?)", (uuid.uuid4().hex,))
+                conn.commit()
+                row = conn.execute("SELECT value FROM db_meta WHERE key = 'identity'").fetchone()
+            return row[0]
+        finally:
+            conn.close()
+
+    def max_ticket_id(self):
+        """Highest ticket_id in the hot tables or the archive (0 when empty)."""
+        with self._reading() as conn:
+            query = TicketQuery(self._ticket_source(conn)).measure("MAX(ticket_id)", "max_id")
+            return self._run(conn, query)[0]["max_id"] or 0
+
+    def fetch_ticket_texts(self, after_id=0, limit=5000):
+        """Return ticket_id, title, description for tickets with id > after_id, in id order."""
+        with self._reading() as conn:
+            query = (
+                TicketQuery(self._ticket_source(conn, detail=True))
+                .dimension("ticket_id").dimension("title").dimension("description")
+                .where("ticket_id", after_id, ">")
+                .order_by("ticket_id")
+                .limit(limit)
+            )
+            return self._run(conn, query)
+
+    def get_tickets(self, ticket_ids):
+        """Return summary rows (incl. resolution hours) for the given ticket ids."""
+        if not ticket_ids:
+            return []
+        placeholders = ",".join("?" for _ in ticket_ids)
+        with self._reading() as conn:
+            query = TicketQuery(self._ticket_source(conn)).where_sql(f"ticket_id IN ({placeholders})", *ticket_ids)
+            for col in ["ticket_id", "title", "status", "priority", "category", "assignee", "created_at", "resolved_at"]:
+                query.dimension(col)
+            query.dimension("(JULIANDAY(resolved_at) - JULIANDAY(created_at)) * 24", "resolution_hours")
+            return self._run(conn, query)
 
     def _count_query(self, conn, analysis, time_cutoff=None):
-        query = "SELECT status, priority, COUNT(*) as count FROM tickets WHERE 1=1"
-        params = []
-        if analysis.get("status"):
-            query += " AND status = ?"
-            params.append(analysis["status"])
-        if analysis.get("priority"):
-            query += " AND priority = ?"
-            params.append(analysis["priority"])
-        extra, params = self._time_filter_sql(analysis.get("time_filter"), params)
-        query += extra + " GROUP BY status, priority"
-        cur = conn.execute(query, params)
-        rows = _rows_to_dicts(cur)
+        query = (
+            self._base_query(conn, analysis, time_cutoff, COUNT_FILTERS)
+            .dimension("status").dimension("priority")
+            .measure("COUNT(*)", "count")
+        )
+        rows = self._run(conn, query)
         total = sum(r["count"] for r in rows)
         return {
             "query_type": "count",
@@ -105,82 +827,73 @@ class DBManager:
         }
 
     def _sla_query(self, conn, analysis, time_cutoff=None):
-        query = """
-            SELECT
-                priority,
-                COUNT(*) as total_tickets,
-                SUM(CASE WHEN resolved_at IS NOT NULL AND resolved_at <= sla_deadline THEN 1 ELSE 0 END) as met_sla,
-                SUM(CASE WHEN resolved_at IS NOT NULL AND resolved_at > sla_deadline THEN 1 ELSE 0 END) as missed_sla,
-                SUM(CASE WHEN resolved_at IS NULL AND datetime('now') > sla_deadline THEN 1 ELSE 0 END) as overdue
-            FROM tickets
-            WHERE 1=1
-        """
-        params = []
-        extra, params = self._time_filter_sql(analysis.get("time_filter"), params)
-        query += extra + " GROUP BY priority"
-        cur = conn.execute(query, params)
-        return {"query_type": "sla", "sla_metrics": _rows_to_dicts(cur)}
+        query = (
+            self._base_query(conn, analysis, time_cutoff)
+            .dimension("priority")
+            .measure("COUNT(*)", "total_tickets")
+            .measure("SUM(CASE WHEN resolved_at IS NOT NULL AND resolved_at <= sla_deadline THEN 1 ELSE 0 END)", "met_sla")
+            .measure("SUM(CASE WHEN resolved_at IS NOT NULL AND resolved_at > sla_deadline THEN 1 ELSE 0 END)", "missed_sla")
+            .measure("SUM(CASE WHEN resolved_at IS NULL AND datetime('now') > sla_deadline THEN 1 ELSE 0 END)", "overdue")
+        )
+        return {"query_type": "sla", "sla_metrics": self._run(conn, query)}
 
     def _assignee_query(self, conn, analysis, time_cutoff=None):
-        query = """
-            SELECT
-                assignee,
-                COUNT(*) as total_tickets,
-                SUM(CASE WHEN status = 'Open' THEN 1 ELSE 0 END) as open_tickets,
-                SUM(CASE WHEN status = 'In Progress' THEN 1 ELSE 0 END) as in_progress,
-                SUM(CASE WHEN status IN ('Resolved','Closed') THEN 1 ELSE 0 END) as resolved
-            FROM tickets
-            WHERE assignee IS NOT NULL
-        """
-        params = []
-        extra, params = self._time_filter_sql(analysis.get("time_filter"), params)
-        query += extra + " GROUP BY assignee ORDER BY total_tickets DESC"
-        cur = conn.execute(query, params)
-        return {"query_type": "assignee", "assignee_stats": _rows_to_dicts(cur)}
+        query = (
+            self._base_query(conn, analysis, time_cutoff)
+            .where_sql("assignee IS NOT NULL")
+            .dimension("assignee")
+            .measure("COUNT(*)", "total_tickets")
+            .measure("SUM(CASE WHEN status = 'Open' THEN 1 ELSE 0 END)", "open_tickets")
+            .measure("SUM(CASE WHEN status = 'In Progress' THEN 1 ELSE 0 END)", "in_progress")
+            .measure("SUM(CASE WHEN status IN ('Resolved','Closed') THEN 1 ELSE 0 END)", "resolved")
+            .order_by("total_tickets DESC")
+        )
+        return {"query_type": "assignee", "assignee_stats": self._run(conn, query)}
 
     def _performance_query(self, conn, analysis, time_cutoff=None):
-        query = """
-            SELECT
-                priority,
-                category,
-                COUNT(*) as total_resolved,
-                AVG((JULIANDAY(resolved_at) - JULIANDAY(created_at)) * 24) as avg_resolution_hours
-            FROM tickets
-            WHERE resolved_at IS NOT NULL
-        """
-        params = []
-        extra, params = self._time_filter_sql(analysis.get("time_filter"), params)
-        query += extra + " GROUP BY priority, category"
-        cur = conn.execute(query, params)
-        return {"query_type": "performance", "performance_metrics": _rows_to_dicts(cur)}
+        if self._archive_reaches(conn, time_cutoff):
+            sql, params = self._resolved_rows_query(conn, analysis, time_cutoff)
+            query = (
+                TicketQuery(f"({sql})", params)
+                .dimension("priority").dimension("category")
+                .measure("SUM(n)", "total_resolved")
+                .measure("SUM(hours) / SUM(n)", "avg_resolution_hours")
+            )
+        else:
+            query = (
+                self._base_query(conn, analysis, time_cutoff)
+                .where_sql("resolved_at IS NOT NULL")
+                .dimension("priority").dimension("category")
+                .measure("COUNT(*)", "total_resolved")
+                .measure("AVG((JULIANDAY(resolved_at) - JULIANDAY(created_at)) * 24)", "avg_resolution_hours")
+            )
+        return {"query_type": "performance", "performance_metrics": self._run(conn, query)}
 
     def _trend_query(self, conn, analysis, time_cutoff=None):
-        query = """
-            SELECT
-                DATE(created_at) as date,
-                status,
-                COUNT(*) as count
-            FROM tickets
-            WHERE 1=1
-        """
-        params = []
-        extra, params = self._time_filter_sql(analysis.get("time_filter") or {"days": 30}, params)
-        query += extra + " GROUP BY DATE(created_at), status ORDER BY date"
-        cur = conn.execute(query, params)
-        return {"query_type": "trend", "trend_data": _rows_to_dicts(cur)}
+        query = (
+            self._base_query(conn, analysis, time_cutoff)
+            .dimension("DATE(created_at)", "date").dimension("status")
+            .measure("COUNT(*)", "count")
+            .order_by("date")
+        )
+        return {"query_type": "trend", "trend_data": self._run(conn, query)}
 
     def _average_query(self, conn, analysis, time_cutoff=None):
-        query = """
-            SELECT
-                AVG((JULIANDAY(resolved_at) - JULIANDAY(created_at)) * 24) as avg_hours,
-                COUNT(*) as total_resolved
-            FROM tickets
-            WHERE resolved_at IS NOT NULL
-        """
-        params = []
-        extra, params = self._time_filter_sql(analysis.get("time_filter"), params)
-        cur = conn.execute(query + extra, params)
-        rows = _rows_to_dicts(cur)
+        if self._archive_reaches(conn, time_cutoff):
+            sql, params = self._resolved_rows_query(conn, analysis, time_cutoff)
+            query = (
+                TicketQuery(f"({sql})", params)
+                .measure("SUM(hours) / SUM(n)", "avg_hours")
+                .measure("SUM(n)", "total_resolved")
+            )
+        else:
+            query = (
+                self._base_query(conn, analysis, time_cutoff)
+                .where_sql("resolved_at IS NOT NULL")
+                .measure("AVG((JULIANDAY(resolved_at) - JULIANDAY(created_at)) * 24)", "avg_hours")
+                .measure("COUNT(*)", "total_resolved")
+            )
+        rows = self._run(conn, query)
         row = rows[0] if rows else {}
         return {
             "query_type": "average",
@@ -189,13 +902,9 @@ class DBManager:
         }
 
     def _general_query(self, conn, analysis, time_cutoff=None):
-        query = """
-            SELECT status, priority, category, COUNT(*) as count
-            FROM tickets
-            WHERE 1=1
-        """
-        params = []
-        extra, params = self._time_filter_sql(analysis.get("time_filter"), params)
-        query += extra + " GROUP BY status, priority, category"
-        cur = conn.execute(query, params)
-        return {"query_type": "general", "summary": _rows_to_dicts(cur)}
+        query = (
+            self._base_query(conn, analysis, time_cutoff)
+            .dimension("status").dimension("priority").dimension("category")
+            .measure("COUNT(*)", "count")
+        )
+        return {"query_type": "general", "summary": self._run(conn, query)}
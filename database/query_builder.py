@@ -0,0 +1,95 @@
+"""
+Composable ticket query builder: dimensions, measures, filters and a time range
+rendered to canonical, fully parameterized SQL. Queries of the same shape always
+produce the same SQL text, so sqlite3's per-connection statement cache reuses the
+prepared statement (see DBManager.connect / cached_statements).
+"""
+
+
+def _alias(expr, alias):
+    return f"{expr} AS {alias}" if alias and alias != expr else expr
+
+
+class TicketQuery:
+    """
+    SELECT builder over a ticket relation (table, view, or parenthesized subquery).
+    Filters with a None value are skipped, so analysis dicts can be passed straight through.
+    """
+
+    def __init__(self, source="tickets", source_params=None):
+        self.source = source
+        self.source_params = list(source_params or [])
+        self._dimensions = []
+        self._measures = []
+        self._filters = {}
+        self._predicates = []
+        self._since = None
+        self._order = []
+        self._limit = None
+
+    def dimension(self, expr, alias=None):
+        """Grouping column (GROUP BY expr when the query has measures)."""
+        self._dimensions.append((expr, alias))
+        return self
+
+    def measure(self, expr, alias):
+        """Aggregate column, e.g. measure("COUNT(*)", "count")."""
+        self._measures.append((expr, alias))
+        return self
+
+    def where(self, column, value, op="="):
+        """column <op> ? filter; ignored when value is None. One filter per column."""
+        if value is not None:
+            self._filters[column] = (op, value)
+        return self
+
+    def where_sql(self, predicate, *params):
+        """Fixed predicate with its own placeholders (e.g. "resolved_at IS NOT NULL")."""
+        self._predicates.append((predicate, list(params)))
+        return self
+
+    def since(self, cutoff, column="created_at"):
+        """Time range: column >= cutoff; ignored when cutoff is None."""
+        self._since = (column, cutoff) if cutoff is not None else None
+        return self
+
+    def order_by(self, *exprs):
+        self._order = list(exprs)
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def build(self):
+        """Return (sql, params). Filters render in column order, so equal shapes give equal SQL."""
+        columns = [_alias(e, a) for e, a in self._dimensions + self._measures]
+        sql = f"SELECT {', '.join(columns) or '*'} FROM {self.source}"
+        params = list(self.source_params)
+        clauses = []
+        for predicate, predicate_params in self._predicates:
+            clauses.append(predicate)
+            params += predicate_params
+        for column in sorted(self._filters):
+            op, value = self._filters[column]
+            clauses.append(f"{column} {op} ?")
+            params.append(value)
+        if self._since:
+            clauses.append(f"{self._since[0]} >= ?")
+            params.append(self._since[1])
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if self._measures and self._dimensions:
+            sql += " GROUP BY " + ", ".join(e for e, _ in self._dimensions)
+        if self._order:
+            sql += " ORDER BY " + ", ".join(self._order)
+        if self._limit is not None:
+            sql += " LIMIT ?"
+            params.append(self._limit)
+        return sql, params
+
+
+def union_all(*queries):
+    """Combine built TicketQuery objects into one (sql, params) UNION ALL."""
+    parts = [q.build() for q in queries]
+    return " UNION ALL ".join(sql for sql, _ in parts), [p for _, params in parts for p in params]
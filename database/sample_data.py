@@ -30,31 +30,9 @@ CUSTOMERS = [
 SLA_HOURS = {"Critical": 4, "High": 24, "Medium": 48, "Low": 72}
 
 
-def generate_sample_tickets(db_path=None, num_tickets=200):
-    """Insert sample tickets into the database. Creates table if needed."""
-    import sqlite3
-    db_path = db_path or DATABASE_PATH
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(db_path))
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tickets (
-            ticket_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            description TEXT,
-            status TEXT NOT NULL,
-            priority TEXT NOT NULL,
-            category TEXT NOT NULL,
-            assignee TEXT,
-            created_at TIMESTAMP NOT NULL,
-            updated_at TIMESTAMP NOT NULL,
-            resolved_at TIMESTAMP,
-            sla_deadline TIMESTAMP,
-            customer_name TEXT,
-            customer_email TEXT
-        )
-    """)
-    conn.commit()
+def sample_ticket_rows(num_tickets=200):
+    """Build num_tickets random ticket dicts spread over the last 90 days."""
+    rows = []
     for i in range(num_tickets):
         days_ago = random.randint(0, 90)
         created_at = datetime.now() - timedelta(days=days_ago)
@@ -68,17 +46,27 @@ def generate_sample_tickets(db_path=None, num_tickets=200):
         resolved_at = None
         if status in ("Resolved", "Closed"):
             resolved_at = updated_at + timedelta(hours=random.randint(1, 24))
-        title = f"{category} - {customer[0]}"
-        description = f"Customer reported: {category.lower()}. Priority: {priority}"
-        cursor.execute("""
-            INSERT INTO tickets (
-                title, description, status, priority, category,
-                assignee, created_at, updated_at, resolved_at,
-                sla_deadline, customer_name, customer_email
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (title, description, status, priority, category,
-              assignee, created_at, updated_at, resolved_at,
-              sla_deadline, customer[0], customer[1]))
-    conn.commit()
-    conn.close()
+        rows.append({
+            "title": f"{category} - {customer[0]}",
+            "description": f"Customer reported: {category.lower()}. Priority: {priority}",
+            "status": status,
+            "priority": priority,
+            "category": category,
+            "assignee": assignee,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "resolved_at": resolved_at,
+            "sla_deadline": sla_deadline,
+            "customer_name": customer[0],
+            "customer_email": customer[1],
+        })
+    return rows
+
+
+def generate_sample_tickets(db_path=None, num_tickets=200):
+    """Insert sample tickets into the database. Creates table if needed."""
+    from database.db_manager import DBManager
+    db = DBManager(db_path or DATABASE_PATH)
+    db.create_tables()
+    db.insert_tickets(sample_ticket_rows(num_tickets))
     return num_tickets
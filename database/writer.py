@@ -0,0 +1,192 @@
+"""
+Group-commit ticket writer: a single background thread drains a bounded queue and
+applies writes in batched transactions (WAL mode, so readers are never blocked).
+synchronous=FULL makes every commit durable before its futures resolve; batching
+spreads that fsync over the whole batch.
+A batch commits when it reaches max_batch ops or max_latency_ms after its first op.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+class WriteQueueFull(RuntimeError):
+    """Raised by submit() when the writer queue stays full for put_timeout seconds (back-pressure)."""
+
+
+class TicketWriter:
+    """Single-writer queue for DBManager create/update/resolve operations."""
+
+    def __init__(self, db, max_queue: int = 10000, max_batch: int = 500,
+                 max_latency_ms: float = 10.0, put_timeout: float = 1.0):
+        self.db = db
+        self.max_batch = max_batch
+        self.max_latency = max_latency_ms / 1000
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        # stopped -> running -> stopping -> stopped; only the writer thread leaves "stopping".
+        self._state = "stopped"
+        self._lock = threading.Lock()
+        self._state_changed = threading.Condition(self._lock)
+        self.batches = 0
+        self.committed = 0
+        self.failed = 0
+        self.listener_errors = 0
+        self.listeners = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self):
+        """Start the writer thread unless it is running; waits out a stop in progress."""
+        with self._state_changed:
+            while self._state == "stopping":
+                self._state_changed.wait()
+            if self._state == "stopped":
+                self._spawn()
+        return self
+
+    def _spawn(self):
+        self._state = "running"
+        self._thread = threading.Thread(target=self._run, name="ticket-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """Flush queued writes and stop the thread."""
+        with self._state_changed:
+            thread = self._thread
+            if self._state == "running":
+                self._state = "stopping"
+                self._queue.put(None)
+        if thread is not None:
+            thread.join(timeout)
+
+    def submit(self, op: str, *args) -> Future:
+        """Queue op(*args) (see DBManager._apply_write); the Future resolves after commit."""
+        future = Future()
+        self.start()
+        try:
+            self._queue.put((op, args, future), timeout=self.put_timeout)
+        except queue.Full:
+            raise WriteQueueFull(
+                f"ticket writer queue full ({self._queue.maxsize} pending); retry later"
+            ) from None
+        # A stop() between start() and put() may have let the thread drain and exit; restart it.
+        self.start()
+        return future
+
+    def flush(self, timeout: float = None):
+        """Block until everything queued so far is committed."""
+        self.submit("noop").result(timeout)
+
+    def _connect(self):
+        conn = self.db.connect()
+        conn.isolation_level = None  # transactions are managed explicitly per batch
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        return conn
+
+    def _run(self):
+        conn = None
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                batch = [item]
+                stop = False
+                deadline = time.monotonic() + self.max_latency
+                while len(batch) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+                try:
+                    conn = conn or self._connect()
+                    self._commit_batch(conn, batch)
+                except Exception as e:
+                    # Not a write error (those fail only their op): fail the batch, reconnect, keep going.
+                    self._fail(batch, e)
+                    if conn is not None:
+                        conn.close()
+                        conn = None
+                if stop:
+                    return
+        finally:
+            if conn is not None:
+                conn.close()
+            with self._state_changed:
+                self._state = "stopped"
+                self._thread = None
+                if not self._queue.empty():
+                    self._spawn()  # writes submitted behind the stop sentinel
+                self._state_changed.notify_all()
+
+    def _fail(self, batch, error):
+        """Fail every still-pending future in batch with error."""
+        for _, _, future in batch:
+            if not future.done():
+                self.failed += 1
+                future.set_exception(error)
+
+    def _commit_batch(self, conn, batch):
+        """Apply each op under its own savepoint so one bad write does not fail the batch."""
+        start = time.perf_counter()
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for op, args, future in batch:
+                conn.execute("SAVEPOINT op")
+                try:
+                    results.append((future, self.db._apply_write(conn, op, *args), None))
+                    conn.execute("RELEASE op")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO op")
+                    conn.execute("RELEASE op")
+                    results.append((future, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self._fail(batch, e)
+            return
+        tracer.observe("db.write.batch", (time.perf_counter() - start) * 1000, size=len(batch))
+        self.batches += 1
+        applied = []
+        for (op, args, _), (future, result, error) in zip(batch, results):
+            if error is not None:
+                self.failed += 1
+                future.set_exception(error)
+            else:
+                self.committed += 1
+                future.set_result(result)
+                applied.append((op, args, result))
+        for listener in self.listeners:
+            try:
+                listener(applied)
+            except Exception:
+                # A failing listener must never stop the writer, but it must not go unnoticed.
+                self.listener_errors += 1
+                logger.exception("ticket writer listener %r failed", listener)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "batches": self.batches,
+            "committed": self.committed,
+            "failed": self.failed,
+            "listener_errors": self.listener_errors,
+        }
@@ -2,14 +2,25 @@
 Standalone script to create the database and populate sample tickets.
 Run once: python database_setup.py
 Or the app will auto-create on first run.
+Existing databases: python database_setup.py --migrate-only applies schema changes
+(e.g. TICKET_PARTITIONING=true) without adding sample tickets.
 """
+import argparse
+
 from config import DATABASE_PATH
 from database.db_manager import DBManager
 from database.sample_data import generate_sample_tickets
 
 def main():
+    parser = argparse.ArgumentParser(description="Create the ticket database and sample data.")
+    parser.add_argument("--migrate-only", action="store_true",
+                        help="only create/migrate the schema; do not insert sample tickets")
+    args = parser.parse_args()
     print("🚀 IT Support Bot - Database setup\n")
     DBManager().create_tables()
+    if args.migrate_only:
+        print(f"✅ Schema up to date: {DATABASE_PATH}")
+        return
     n = generate_sample_tickets(num_tickets=200)
     print(f"✅ Created {DATABASE_PATH}")
     print(f"✅ Inserted {n} sample tickets.")
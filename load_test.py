@@ -0,0 +1,182 @@
+"""
+Concurrent-user load test for the full question pipeline (analyze -> DB -> similar
+tickets -> agent crew) with the offline synthetic LLM, so runs are repeatable and free.
+Run: python load_test.py [--concurrency 8] [--requests 200] [--llm-latency-ms 50]
+Uses a temporary seeded database unless --db is given; nothing in data/ is touched.
+Reports throughput, error rate and p50/p95/p99 per stage (Markdown on stdout, --json to save).
+"""
+import os
+
+# CrewAI telemetry retries network calls per kickoff; keep the measurement offline.
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+import argparse
+import json
+import math
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from config import EXAMPLE_QUESTIONS, SUPPORT_ROLES
+from database.db_manager import DBManager
+from database.sample_data import sample_ticket_rows
+from utils.pipeline import AGENTS_AVAILABLE, SIMILARITY_AVAILABLE, run_pipeline
+from utils.tracing import tracer
+
+STAGES = ["total", "analyze_question", "execute_query", "similar_tickets", "crew"]
+_TEMPLATES = [
+    "How many {priority} priority tickets are {status}?",
+    "Show me {category} tickets from the last {days} days",
+    "What's the average resolution time for {category} tickets?",
+    "List {status} tickets assigned to {assignee}",
+    "What's our SLA compliance for {priority} tickets this month?",
+]
+_FILLS = {
+    "priority": ["critical", "high", "medium", "low"],
+    "status": ["open", "in progress", "pending", "resolved"],
+    "category": ["VPN", "email", "password", "printer", "network"],
+    "days": ["7", "14", "30"],
+    "assignee": ["Sarah", "Omar", "Fatima"],
+}
+
+
+def question_mix(n: int, rng: random.Random):
+    """n (question, role) pairs: the sidebar examples plus templated variants, roles mixed."""
+    pool = [q for questions in EXAMPLE_QUESTIONS.values() for q in questions]
+    out = []
+    for _ in range(n):
+        if rng.random() < 0.5:
+            question = rng.choice(pool)
+        else:
+            question = rng.choice(_TEMPLATES).format(**{k: rng.choice(v) for k, v in _FILLS.items()})
+        out.append((question, rng.choice(SUPPORT_ROLES)))
+    return out
+
+
+def percentile(sorted_values, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def run_load(db, questions, concurrency: int, crew_factory=None, index=None):
+    """Run questions on `concurrency` worker threads; returns the report dict."""
+    use_agents = crew_factory is not None
+
+    def one(item):
+        question, role = item
+        try:
+            crew = crew_factory() if use_agents else None
+            result = run_pipeline(question, role, db=db, crew=crew, index=index, use_agents=use_agents)
+            return result.timings, repr(result.error) if result.error else None
+        except Exception as e:
+            return {}, repr(e)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, questions))
+    elapsed = time.perf_counter() - start
+
+    errors = [err for _, err in outcomes if err]
+    stages = {}
+    for stage in STAGES:
+        values = sorted(t[stage] for t, _ in outcomes if stage in t)
+        if values:
+            stages[stage] = {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 0.50), 2),
+                "p95_ms": round(percentile(values, 0.95), 2),
+                "p99_ms": round(percentile(values, 0.99), 2),
+                "max_ms": round(values[-1], 2),
+            }
+    return {
+        "requests": len(questions),
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(questions) / elapsed, 2) if elapsed else 0.0,
+        "errors": len(errors),
+        "error_rate": round(len(errors) / len(questions), 4) if questions else 0.0,
+        "sample_errors": sorted(set(errors))[:5],
+        "stages": stages,
+        "tracer": tracer.summary(),
+    }
+
+
+def to_markdown(report: dict) -> str:
+    lines = [
+        f"## Load test: {report['requests']} requests, concurrency {report['concurrency']}",
+        "",
+        f"- Throughput: **{report['throughput_rps']} req/s** ({report['elapsed_s']} s)",
+        f"- Errors: {report['errors']} ({report['error_rate']:.2%})",
+        "",
+        "| Stage | Count | p50 ms | p95 ms | p99 ms | Max ms |",
+        "|---|---|---|---|---|---|",
+    ]
+    for stage, s in report["stages"].items():
+        lines.append(f"| {stage} | {s['count']} | {s['p50_ms']} | {s['p95_ms']} | {s['p99_ms']} | {s['max_ms']} |")
+    for err in report["sample_errors"]:
+        lines.append(f"\n⚠️ {err}")
+    return "\n".join(lines)
+
+
+def _crew_factory(latency_ms: float, tokens_per_sec: float):
+    from agents.crew_setup import ITSupportCrew
+    from agents.replay_llm import ReplayChatModel
+    llm = ReplayChatModel(mode="synthetic", latency_ms=latency_ms, tokens_per_sec=tokens_per_sec)
+    # CrewAI's verbose step log would flood stdout and serialize workers on it.
+    return lambda: ITSupportCrew(llm=llm, verbose=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-user load test for the question pipeline.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tickets", type=int, default=5000, help="tickets in the temporary database")
+    parser.add_argument("--db", help="existing database to query instead of a temporary one")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="synthetic LLM latency per call")
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0, help="synthetic LLM token rate (0 = instant)")
+    parser.add_argument("--no-crew", action="store_true", help="measure question analysis and the DB query only")
+    parser.add_argument("--json", help="write the report as JSON to this path")
+    parser.add_argument("--markdown", help="write the Markdown table to this path")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    questions = question_mix(args.requests, rng)
+    crew_factory = None
+    if not args.no_crew:
+        if not AGENTS_AVAILABLE:
+            parser.error("agents are unavailable (install crewai/langchain) — use --no-crew")
+        crew_factory = _crew_factory(args.llm_latency_ms, args.tokens_per_sec)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.db:
+            db = DBManager(args.db)
+        else:
+            db = DBManager(Path(tmp) / "load.db")
+            db.create_tables()
+            db.insert_tickets(sample_ticket_rows(args.tickets))
+        index = None
+        if SIMILARITY_AVAILABLE:
+            from utils.similarity import TicketIndex
+            index = TicketIndex(tmp, name="load_vectors")
+            index.sync(db)
+        tracer.reset()
+        report = run_load(db, questions, args.concurrency, crew_factory, index)
+        db.close()
+
+    markdown = to_markdown(report)
+    print(markdown)
+    if args.markdown:
+        Path(args.markdown).write_text(markdown + "\n", encoding="utf-8")
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2, default=str), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""Shared fixtures for the test suite."""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.db_manager import DBManager
+
+
+@pytest.fixture
+def make_db():
+    """Factory for a DBManager at path with rows inserted (plain table unless partitioned)."""
+    def make(path, rows, partitioned=False):
+        db = DBManager(path, partitioned=partitioned)
+        db.create_tables()
+        db.insert_tickets(rows)
+        return db
+    return make
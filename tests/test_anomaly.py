@@ -0,0 +1,129 @@
+"""Unit tests for streaming anomaly detection (no LLM)."""
+import random
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.anomaly import AnomalyMonitor, DailyDetector
+from database.sample_data import sample_ticket_rows
+from utils.analytics import format_db_results
+
+START = date(2026, 1, 5)  # a Monday
+
+
+def _feed(detector, counts):
+    for i, n in enumerate(counts):
+        detector.add(START + timedelta(days=i), n)
+    detector.advance_to(START + timedelta(days=len(counts)))
+
+
+def test_detector_flags_spike_after_warmup():
+    random.seed(1)
+    detector = DailyDetector(alpha=0.1, warmup_days=14)
+    _feed(detector, [random.randint(8, 12) for _ in range(35)] + [40])
+    assert detector.last["observed"] == 40
+    assert detector.last["z"] > 3
+
+
+def test_weekly_seasonality_is_not_an_anomaly():
+    detector = DailyDetector(alpha=0.1, warmup_days=14)
+    week = [40, 42, 38, 41, 39, 4, 3]
+    _feed(detector, week * 6)
+    assert abs(detector.last["z"]) < 1  # a quiet Sunday is expected
+    detector.add(START + timedelta(days=42), 4)  # ...but a quiet Monday is not
+    detector.advance_to(START + timedelta(days=43))
+    assert detector.last["z"] < -3
+
+
+def test_detector_state_round_trips():
+    detector = DailyDetector()
+    _feed(detector, [3, 5, 4, 6])
+    clone = DailyDetector.from_dict(detector.to_dict())
+    assert clone.to_dict() == detector.to_dict()
+
+
+def test_restart_replays_only_new_tickets(tmp_path, make_db):
+    random.seed(5)
+    old, new = sample_ticket_rows(300), sample_ticket_rows(40)
+    now = datetime.now()
+    new = [dict(r, created_at=now, updated_at=now, resolved_at=None, status="Open") for r in new]
+
+    db = make_db(tmp_path / "restart.db", old)
+    AnomalyMonitor(db).load()
+    db.insert_tickets(new)
+    restarted = AnomalyMonitor(db).load()
+
+    fresh = AnomalyMonitor(make_db(tmp_path / "fresh.db", old + new)).load()
+    assert restarted.last_ticket_id == fresh.last_ticket_id == 340
+    assert {k: d.to_dict() for k, d in restarted.detectors.items()} == \
+        {k: d.to_dict() for k, d in fresh.detectors.items()}
+
+
+def test_writer_feeds_monitor_and_query_answers_from_state(tmp_path, make_db):
+    random.seed(9)
+    db = make_db(tmp_path / "live.db", sample_ticket_rows(200))
+    monitor = db.anomaly_monitor
+    today = date.today()
+    before = monitor.detectors[("volume", "all", "*")]
+    before_count = before.count if before.day == today else 0
+
+    overdue = datetime.now() - timedelta(days=2)
+    ids = [db.create_ticket(title="VPN down", category="VPN Issue", priority="Critical",
+                            created_at=overdue, sla_deadline=overdue).result(5) for _ in range(3)]
+    for ticket_id in ids:
+        db.resolve_ticket(ticket_id)
+    db.writer.flush(5)
+    monitor.catch_up()  # the flush's own batch may still be in its listeners
+
+    volume = monitor.detectors[("volume", "category", "VPN Issue")]
+    breaches = monitor.detectors[("sla_breach", "priority", "Critical")]
+    assert breaches.day == today and breaches.count >= 3
+    # Backdated creates land on a closed day and are ignored, not double counted.
+    assert monitor.detectors[("volume", "all", "*")].count == before_count
+    assert volume.day >= overdue.date()
+
+    results = db.execute_query({"type": "anomaly", "status": None, "priority": "Critical",
+                                "category": None, "time_filter": None})
+    assert results["query_type"] == "anomaly"
+    assert all(a["value"] == "Critical" for a in results["anomalies"])
+    assert "Anomalies" in format_db_results(results)
+
+
+def test_report_counts_tickets_written_outside_the_writer(tmp_path, make_db):
+    random.seed(11)
+    db = make_db(tmp_path / "direct.db", sample_ticket_rows(200))
+    monitor = db.anomaly_monitor
+    before = monitor.detectors[("volume", "all", "*")]
+    before_count = before.count if before.day == date.today() else 0
+
+    now = datetime.now()
+    db.insert_tickets([
+        dict(row, created_at=now, updated_at=now, resolved_at=now, sla_deadline=now - timedelta(hours=1),
+             status="Resolved", priority="Low")
+        for row in sample_ticket_rows(5)
+    ])
+    monitor.report()
+
+    assert monitor.detectors[("volume", "all", "*")].count == before_count + 5
+    assert monitor.detectors[("sla_breach", "priority", "Low")].count >= 5
+    assert monitor.last_ticket_id == 205
+
+
+def test_breach_resolved_earlier_but_committed_later_is_counted(tmp_path, make_db):
+    random.seed(13)
+    db = make_db(tmp_path / "late.db", sample_ticket_rows(200))
+    monitor = db.anomaly_monitor
+    before = monitor.detectors.get(("sla_breach", "priority", "Low"))
+    before_count = before.count if before and before.day == date.today() else 0
+
+    now = datetime.now()
+    midnight = datetime.combine(now.date(), datetime.min.time())
+    for resolved_at in (now, midnight):  # the second resolution is older than the first
+        db.insert_tickets([dict(sample_ticket_rows(1)[0], created_at=midnight, updated_at=resolved_at,
+                                resolved_at=resolved_at, sla_deadline=midnight - timedelta(hours=1),
+                                status="Resolved", priority="Low")])
+        monitor.report()
+
+    assert monitor.detectors[("sla_breach", "priority", "Low")].count == before_count + 2
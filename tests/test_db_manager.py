@@ -0,0 +1,252 @@
+"""Unit tests for DBManager query execution and storage layout (no LLM)."""
+import random
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.db_manager import DBManager, _tickets_ddl
+from database.sample_data import sample_ticket_rows
+
+QUERY_TYPES = ["count", "trend", "average", "sla", "assignee", "performance", "general"]
+
+
+@pytest.fixture
+def rows():
+    random.seed(7)
+    return sample_ticket_rows(300)
+
+
+def _make_db(path, rows, partitioned):
+    db = DBManager(path, partitioned=partitioned)
+    db.create_tables()
+    db.insert_tickets(rows)
+    return db
+
+
+def _analysis(query_type, days):
+    return {"type": query_type, "status": None, "priority": None,
+            "time_filter": {"days": days} if days else None}
+
+
+@pytest.mark.parametrize("days", [None, 7, 45])
+def test_partitioned_results_match_plain_table(tmp_path, rows, days):
+    plain = _make_db(tmp_path / "plain.db", rows, partitioned=False)
+    parts = _make_db(tmp_path / "parts.db", rows, partitioned=True)
+    for query_type in QUERY_TYPES:
+        analysis = _analysis(query_type, days)
+        assert parts.execute_query(analysis) == plain.execute_query(analysis), query_type
+
+
+def test_time_filter_prunes_old_partitions(tmp_path, rows):
+    db = _make_db(tmp_path / "parts.db", rows, partitioned=True)
+    conn = db.connect()
+    try:
+        partitions = db._partitions(conn)
+        assert len(partitions) >= 3
+        week = db._base_query(conn, {}, datetime.now() - timedelta(days=7)).measure("COUNT(*)", "n").build()
+        plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + week[0], week[1]))
+        assert partitions[0][0] not in plan
+        assert partitions[-1][0] in plan
+        # Cutoffs inside the same partition set share one SQL text (and cached statement).
+        latest = partitions[-1][1]
+        first, second = (db._base_query(conn, {}, latest + timedelta(hours=h)).build()[0] for h in (1, 2))
+        assert first == second
+        assert db._ticket_source(conn) == "tickets"
+        db.archive_resolved(older_than_days=30)
+        assert "archive" not in db._ticket_source(conn, datetime.now() - timedelta(days=7))
+    finally:
+        conn.close()
+
+
+def test_plain_table_is_migrated_to_partitions(tmp_path, rows):
+    path = tmp_path / "legacy.db"
+    plain = _make_db(path, rows, partitioned=False)
+    before = plain.execute_query(_analysis("general", None))
+    migrated = DBManager(path, partitioned=True)
+    migrated.create_tables()
+    assert migrated.execute_query(_analysis("general", None)) == before
+    new_id = migrated.insert_tickets([dict(rows[0], created_at=datetime.now() + timedelta(days=40))])
+    assert new_id == [len(rows) + 1]
+
+
+@pytest.mark.parametrize("partitioned", [False, True])
+@pytest.mark.parametrize("days", [None, 7, 45])
+def test_archived_results_match_unarchived(tmp_path, rows, partitioned, days):
+    live = _make_db(tmp_path / "live.db", rows, partitioned)
+    archived = _make_db(tmp_path / "archived.db", rows, partitioned)
+    assert archived.archive_resolved(older_than_days=30) > 0
+    for query_type in QUERY_TYPES:
+        analysis = _analysis(query_type, days)
+        expected, actual = live.execute_query(analysis), archived.execute_query(analysis)
+        if query_type == "average":
+            assert actual["total_resolved"] == expected["total_resolved"]
+            assert actual["avg_resolution_hours"] == pytest.approx(expected["avg_resolution_hours"])
+        elif query_type == "performance":
+            key = lambda r: (r["priority"], r["category"])
+            exp = sorted(expected["performance_metrics"], key=key)
+            act = sorted(actual["performance_metrics"], key=key)
+            assert [r["total_resolved"] for r in act] == [r["total_resolved"] for r in exp]
+            assert [r["avg_resolution_hours"] for r in act] == pytest.approx([r["avg_resolution_hours"] for r in exp])
+        else:
+            assert actual == expected, query_type
+
+
+def test_archive_keeps_descriptions_and_shrinks_hot_table(tmp_path, rows):
+    db = _make_db(tmp_path / "a.db", rows, partitioned=False)
+    moved = db.archive_resolved(older_than_days=30)
+    conn = db.connect()
+    try:
+        (hot,) = conn.execute("SELECT COUNT(*) FROM tickets").fetchone()
+        assert hot == len(rows) - moved
+        # A recent window that misses every archived ticket reads the hot table only.
+        assert db._ticket_source(conn, datetime.now() - timedelta(days=1)) == "tickets"
+        assert db._ticket_source(conn) == "tickets_all"
+    finally:
+        conn.close()
+    texts = db.fetch_ticket_texts(after_id=0, limit=len(rows))
+    assert len(texts) == len(rows)
+    assert all(r["description"].startswith("Customer reported") for r in texts)
+
+
+@pytest.mark.parametrize("partitioned", [False, True])
+def test_keyset_pages_cover_stream_in_order(tmp_path, rows, partitioned):
+    db = _make_db(tmp_path / "list.db", rows, partitioned)
+    analysis = {"type": "list", "status": "Open", "priority": None, "assignee": None, "time_filter": None}
+    paged, cursor = [], None
+    while True:
+        page = db.list_tickets(analysis, after=cursor, page_size=7)
+        paged += [t["ticket_id"] for t in page["tickets"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    streamed = [t["ticket_id"] for t in db.iter_tickets(analysis, chunk_size=5)]
+    assert paged == streamed
+    assert len(paged) == sum(1 for r in rows if r["status"] == "Open")
+    assert db.execute_query(analysis)["tickets"][0]["ticket_id"] == paged[0]
+
+
+def test_list_filters_by_assignee_prefix(tmp_path, rows):
+    db = _make_db(tmp_path / "list.db", rows, partitioned=False)
+    analysis = {"type": "list", "status": None, "priority": None, "assignee": "Sarah", "time_filter": None}
+    tickets = list(db.iter_tickets(analysis))
+    assert tickets
+    assert all(t["assignee"] == "Sarah Ali" for t in tickets)
+
+
+def test_query_builder_emits_canonical_sql():
+    from database.query_builder import TicketQuery
+
+    def build(first, second):
+        q = TicketQuery().dimension("status").measure("COUNT(*)", "count")
+        q.where(first[0], first[1]).where(second[0], second[1]).since(datetime(2026, 1, 1))
+        return q.build()
+
+    a = build(("priority", "High"), ("category", "VPN Issue"))
+    b = build(("category", "VPN Issue"), ("priority", "High"))
+    assert a == b
+    assert a[0] == (
+        "SELECT status, COUNT(*) AS count FROM tickets "
+        "WHERE category = ? AND priority = ? AND created_at >= ? GROUP BY status"
+    )
+    assert TicketQuery().where("status", None).build() == ("SELECT * FROM tickets", [])
+
+
+@pytest.mark.parametrize("archived", [False, True])
+def test_category_and_assignee_filters(tmp_path, rows, archived):
+    db = _make_db(tmp_path / "f.db", rows, partitioned=False)
+    if archived:
+        db.archive_resolved(older_than_days=30)
+    analysis = {"type": "general", "status": None, "priority": None, "category": "VPN Issue",
+                "assignee": "Sarah", "time_filter": None}
+    summary = db.execute_query(analysis)["summary"]
+    expected = sum(1 for r in rows if r["category"] == "VPN Issue" and r["assignee"] == "Sarah Ali")
+    assert sum(r["count"] for r in summary) == expected
+    perf = db.execute_query(dict(analysis, type="performance"))["performance_metrics"]
+    assert sum(r["total_resolved"] for r in perf) == sum(
+        1 for r in rows if r["category"] == "VPN Issue" and r["assignee"] == "Sarah Ali" and r["resolved_at"]
+    )
+
+
+def test_aggregates_skip_archived_descriptions(tmp_path, rows):
+    db = _make_db(tmp_path / "a.db", rows, partitioned=False)
+    db.archive_resolved(older_than_days=30)
+    conn = db.connect()
+    try:
+        # Undecodable blobs: any aggregate that decompressed description would raise.
+        conn.execute("UPDATE tickets_archive SET description_z = x'00'")
+        conn.commit()
+    finally:
+        conn.close()
+    for query_type in QUERY_TYPES + ["list"]:
+        db.execute_query(_analysis(query_type, None))
+    assert len(db.get_tickets(list(range(1, len(rows) + 1)))) == len(rows)
+
+
+def test_updating_archived_ticket_raises(tmp_path, rows):
+    db = _make_db(tmp_path / "a.db", rows, partitioned=False)
+    db.archive_resolved(older_than_days=30)
+    conn = db.connect()
+    try:
+        (archived_id,) = conn.execute("SELECT MIN(ticket_id) FROM tickets_archive").fetchone()
+    finally:
+        conn.close()
+    with pytest.raises(ValueError, match="archived"):
+        db.update_ticket(archived_id, assignee="Omar").result(timeout=5)
+    assert db.update_ticket(len(rows) + 100, assignee="Omar").result(timeout=5) is False
+
+
+def test_connect_adds_index_missing_from_older_databases(tmp_path, rows):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute(_tickets_ddl("tickets"))
+    conn.commit()
+    conn.close()
+    conn = DBManager(path, partitioned=False).connect()
+    try:
+        names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    finally:
+        conn.close()
+    assert "idx_tickets_created_at" in names
+
+
+def test_read_connections_are_pooled_across_threads(tmp_path, rows):
+    db = _make_db(tmp_path / "pool.db", rows, partitioned=False)
+    with db._reading() as first:
+        pass
+    seen = []
+    worker = threading.Thread(target=lambda: seen.append(db.execute_query(_analysis("count", None))["total"]))
+    worker.start()
+    worker.join()
+    assert seen == [len(rows)]
+    with db._reading() as again:
+        assert again is first
+    db.close()
+    with db._reading() as fresh:
+        assert fresh is not first
+
+
+def test_migration_never_reuses_archived_ids(tmp_path, rows):
+    path = tmp_path / "legacy.db"
+    plain = _make_db(path, rows, partitioned=False)
+    conn = plain.connect()
+    try:
+        # Make the newest ticket archivable, then archive it so the hot table's MAX(ticket_id) drops.
+        conn.execute(
+            "UPDATE tickets SET status = 'Resolved', resolved_at = ?, created_at = ? WHERE ticket_id = ?",
+            (datetime.now() - timedelta(days=60), datetime.now() - timedelta(days=61), len(rows)),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    plain.archive_resolved(older_than_days=30)
+    migrated = DBManager(path, partitioned=True)
+    migrated.create_tables()
+    (new_id,) = migrated.insert_tickets([dict(rows[0], created_at=datetime.now())])
+    assert new_id == len(rows) + 1
+    assert len(migrated.get_tickets([len(rows)])) == 1
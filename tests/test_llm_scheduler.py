@@ -0,0 +1,77 @@
+"""Unit tests for the shared LLM request scheduler (no network)."""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+pytest.importorskip("langchain_core")
+
+from agents.llm_scheduler import LLMQueueTimeout, LLMScheduler, TokenBucket, is_rate_limited, reported_tokens
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(60)
+    now = bucket.updated
+    bucket.consume(60)
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now + 1.0) == pytest.approx(0.0)
+
+
+def test_higher_priority_served_first():
+    sched = LLMScheduler(rpm=600, tpm=100000)
+    sched.requests.tokens = 0
+    order = []
+
+    def submit(priority, name):
+        sched.run(lambda: order.append(name), priority=priority)
+
+    batch = threading.Thread(target=submit, args=(10, "batch"))
+    manager = threading.Thread(target=submit, args=(0, "manager"))
+    batch.start()
+    time.sleep(0.02)
+    manager.start()
+    batch.join(2)
+    manager.join(2)
+    assert order == ["manager", "batch"]
+    assert sched.max_queue_depth == 2
+
+
+def test_retries_rate_limited_calls():
+    sched = LLMScheduler(rpm=1000, tpm=100000, backoff_base=0.001)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise RateLimitError("Too Many Requests")
+        return "ok"
+
+    assert sched.run(flaky) == "ok"
+    assert sched.rate_limited == 2
+    assert is_rate_limited(type("RateLimitError", (Exception,), {})("slow down"))
+    assert not is_rate_limited(ValueError("bad request"))
+    assert not is_rate_limited(ValueError("ticket #429 not found"))
+
+
+def test_queue_wait_is_bounded():
+    sched = LLMScheduler(rpm=60, tpm=100000, max_wait=0.05)
+    sched.requests.tokens = 0  # next slot is ~1s away
+    with pytest.raises(LLMQueueTimeout):
+        sched.run(lambda: "never")
+    assert sched.stats()["timed_out"] == 1
+    assert sched.queue_depth == 0
+
+
+def test_reported_tokens_prefers_provider_usage():
+    from langchain_core.messages import AIMessage
+    groq = AIMessage(content="hi", response_metadata={"token_usage": {"total_tokens": 321}})
+    assert reported_tokens(groq) == 321
+    assert reported_tokens(AIMessage(content="hi")) is None
@@ -0,0 +1,57 @@
+"""Tests for the shared question pipeline and the concurrent load-test harness (no LLM)."""
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.db_manager import DBManager
+from database.sample_data import sample_ticket_rows
+from load_test import percentile, question_mix, run_load
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([7.0], 0.95) == 7.0
+    assert percentile([], 0.5) == 0.0
+
+
+def test_concurrent_run_reports_every_stage(tmp_path):
+    random.seed(3)
+    db = DBManager(tmp_path / "load.db")
+    db.create_tables()
+    db.insert_tickets(sample_ticket_rows(200))
+    questions = question_mix(40, random.Random(1))
+    report = run_load(db, questions, concurrency=6)
+    assert report["errors"] == 0, report["sample_errors"]
+    assert report["stages"]["total"]["count"] == 40
+    assert "crew" not in report["stages"]
+    assert report["stages"]["execute_query"]["p50_ms"] <= report["stages"]["execute_query"]["p99_ms"]
+
+
+def test_load_test_crews_are_quiet():
+    pytest.importorskip("crewai")
+    from load_test import _crew_factory
+    assert _crew_factory(latency_ms=0, tokens_per_sec=0)().verbose is False
+
+
+def test_similar_ticket_failures_are_traced_and_logged(caplog):
+    from utils import pipeline
+    from utils.tracing import tracer
+
+    class BrokenIndex:
+        def sync(self, db):
+            raise RuntimeError("index corrupt")
+
+        search = sync
+
+    if not pipeline.SIMILARITY_AVAILABLE:
+        pytest.skip("similarity retrieval unavailable")
+    tracer.reset()
+    assert pipeline.lookup_similar_tickets(object(), "vpn down", BrokenIndex()) == ""
+    assert "similar-ticket lookup failed" in caplog.text
+    assert any(s["name"] == "similar_tickets.lookup" and s.get("error") for s in tracer.recent_spans)
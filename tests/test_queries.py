@@ -7,7 +7,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from utils.query_processor import analyze_question
-from utils.analytics import format_db_results
+from utils.analytics import format_db_results, iter_csv
 
 
 def test_analyze_question_count_open():
@@ -47,3 +47,32 @@ def test_format_db_results_count():
     out = format_db_results(r)
     assert "42" in out
     assert "Open" in out
+
+
+def test_analyze_question_list_with_assignee():
+    a = analyze_question("List critical open tickets assigned to Sarah")
+    assert a["type"] == "list"
+    assert a["status"] == "Open"
+    assert a["priority"] == "Critical"
+    assert a["assignee"] == "Sarah"
+
+
+def test_iter_csv_chunks():
+    rows = [{"ticket_id": i, "title": f"T{i}"} for i in range(5)]
+    chunks = list(iter_csv(rows, ["ticket_id", "title"], rows_per_chunk=2))
+    assert len(chunks) == 3
+    assert "".join(chunks).splitlines() == ["ticket_id,title"] + [f"{i},T{i}" for i in range(5)]
+
+
+def test_analyze_question_category():
+    a = analyze_question("How many VPN tickets were opened this week?")
+    assert a["type"] == "count"
+    assert a["category"] == "VPN Issue"
+    assert analyze_question("What's the total number of tickets?")["category"] is None
+
+
+def test_analyze_question_anomaly():
+    a = analyze_question("Any spikes in critical tickets?")
+    assert a["type"] == "anomaly"
+    assert a["priority"] == "Critical"
+    assert analyze_question("Is anything unusual happening with VPN?")["category"] == "VPN Issue"
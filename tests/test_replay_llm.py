@@ -0,0 +1,37 @@
+"""Unit tests for the offline replay/record LLM stand-in."""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.messages import HumanMessage
+
+from agents.replay_llm import RecordingChatModel, ReplayChatModel, prompt_key
+
+
+def test_synthetic_is_deterministic_react_answer():
+    llm = ReplayChatModel(mode="synthetic", synthetic_tokens=20)
+    a = llm.invoke([HumanMessage(content="How many open tickets?")]).content
+    b = llm.invoke([HumanMessage(content="How many open tickets?")]).content
+    assert a == b
+    assert "Final Answer:" in a
+
+
+def test_record_then_replay(tmp_path):
+    path = tmp_path / "rec.jsonl"
+    real = ReplayChatModel(mode="synthetic", synthetic_tokens=10)
+    recorder = RecordingChatModel(inner=real, recordings_path=str(path))
+    msgs = [HumanMessage(content="SLA compliance?")]
+    recorded = recorder.invoke(msgs, stop=["Observation"]).content
+    entry = json.loads(path.read_text().splitlines()[0])
+    assert entry["key"] == prompt_key(msgs, ["Observation"])
+
+    replay = ReplayChatModel(recordings_path=str(path), strict=True)
+    assert replay.invoke(msgs, stop=["Observation"]).content == recorded
+    with pytest.raises(KeyError):
+        replay.invoke([HumanMessage(content="never recorded")])
@@ -0,0 +1,77 @@
+"""Unit tests for offline similar-ticket retrieval (no LLM)."""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+np = pytest.importorskip("numpy")
+
+from database.db_manager import DBManager
+from database.sample_data import generate_sample_tickets
+from utils.similarity import TicketIndex, find_similar_tickets, vectorize
+
+
+def test_vectorize_is_normalized_and_deterministic():
+    a = vectorize("VPN Issue - cannot connect", 64)
+    b = vectorize("VPN Issue - cannot connect", 64)
+    assert a.dtype == np.float32
+    assert np.allclose(a, b)
+    assert abs(float(np.linalg.norm(a)) - 1.0) < 1e-5
+
+
+def test_index_search_ranks_closest_first(tmp_path):
+    index = TicketIndex(tmp_path, dim=256)
+    index.append([1, 2, 3], [
+        "Printer Problem paper jam on floor 3",
+        "VPN Issue cannot connect from home",
+        "Password Reset locked out of account",
+    ])
+    index.append([4], ["VPN Issue connection drops every hour"])
+    assert len(index) == 4
+    hits = index.search("vpn cannot connect", k=2)
+    assert [tid for tid, _ in hits] == [2, 4]
+    assert index.search("vpn cannot connect", k=1, exclude_ids=[2])[0][0] == 4
+
+
+def test_sync_is_incremental(tmp_path):
+    db = DBManager(tmp_path / "t.db")
+    generate_sample_tickets(db_path=db.db_path, num_tickets=30)
+    index = TicketIndex(tmp_path, dim=128)
+    assert index.sync(db) == 30
+    generate_sample_tickets(db_path=db.db_path, num_tickets=5)
+    assert index.sync(db) == 5
+    assert index.last_ticket_id() == 35
+    matches = find_similar_tickets(db, index, "VPN Issue", k=3)
+    assert len(matches) == 3
+    assert all("similarity" in m for m in matches)
+
+
+def test_concurrent_searches_sync_once(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    db = DBManager(tmp_path / "t.db")
+    generate_sample_tickets(db_path=db.db_path, num_tickets=40)
+    index = TicketIndex(tmp_path, dim=128)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: find_similar_tickets(db, index, "VPN Issue", k=3), range(32)))
+    assert all(len(r) == 3 for r in results)
+    assert len(index) == 40
+
+
+def test_index_rebuilds_when_database_is_recreated(tmp_path):
+    path = tmp_path / "t.db"
+    generate_sample_tickets(db_path=path, num_tickets=30)
+    index = TicketIndex(tmp_path, dim=128)
+    assert index.sync(DBManager(path)) == 30
+    DBManager(path).close()
+    path.unlink()
+    generate_sample_tickets(db_path=path, num_tickets=10)
+    # Same path and fewer tickets: the old vectors must not survive under reused ids.
+    assert index.sync(DBManager(path)) == 10
+    assert len(index) == 10
+    other = tmp_path / "other.db"
+    generate_sample_tickets(db_path=other, num_tickets=12)
+    assert index.sync(DBManager(other)) == 12
+    assert len(index) == 12
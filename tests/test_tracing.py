@@ -0,0 +1,58 @@
+"""Unit tests for latency tracing and the slow-query log."""
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.tracing import Histogram, Tracer
+
+
+def test_histogram_quantiles():
+    h = Histogram()
+    for ms in [2, 3, 4, 40, 400]:
+        h.observe(ms)
+    assert h.count == 5
+    assert 1 <= h.quantile(0.5) <= 5
+    assert h.quantile(1.0) <= 400
+
+
+def test_span_records_and_exports(tmp_path):
+    t = Tracer(slow_log_path=None)
+    with t.span("pipeline.analyze_question"):
+        pass
+    rows = t.summary()
+    assert rows[0]["stage"] == "pipeline.analyze_question"
+    assert rows[0]["count"] == 1
+    prom = t.prometheus_text()
+    assert 'stage="pipeline.analyze_question",le="+Inf"} 1' in prom
+    path = t.export_jsonl(tmp_path / "metrics.jsonl")
+    snapshot = json.loads(path.read_text().splitlines()[-1])
+    assert "pipeline.analyze_question" in snapshot["histograms"]
+
+
+def test_slow_query_logged_with_plan(tmp_path):
+    log = tmp_path / "slow.jsonl"
+    t = Tracer(slow_query_ms=0, slow_log_path=log)
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE tickets (ticket_id INTEGER PRIMARY KEY, status TEXT)")
+    t.execute_sql(conn, "SELECT COUNT(*) FROM tickets WHERE status = ?", ["Open"]).fetchall()
+    entry = json.loads(log.read_text().splitlines()[0])
+    assert entry["params"] == ["Open"]
+    assert entry["plan"]
+    assert len(t.slow_queries) == 1
+
+
+def test_fetch_time_counts_toward_query(tmp_path):
+    t = Tracer(slow_query_ms=50, slow_log_path=None)
+    conn = sqlite3.connect(":memory:")
+    conn.create_function("slow", 1, lambda x: time.sleep(0.005) or x)
+    conn.execute("CREATE TABLE t (v INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(20)])
+    cur = t.execute_sql(conn, "SELECT slow(v) FROM t")
+    assert "db.sql" not in t.histograms  # still stepping rows
+    assert len(list(cur)) == 20
+    assert t.histograms["db.sql"].sum_ms >= 90
+    assert len(t.slow_queries) == 1
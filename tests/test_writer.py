@@ -0,0 +1,162 @@
+"""Unit tests for the group-commit ticket write path."""
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.db_manager import DBManager
+from database.writer import TicketWriter, WriteQueueFull
+
+
+@pytest.mark.parametrize("partitioned", [False, True])
+def test_create_update_resolve(tmp_path, partitioned):
+    db = DBManager(tmp_path / "w.db", partitioned=partitioned)
+    db.create_tables()
+    try:
+        ticket_id = db.create_ticket(title="VPN down", category="VPN Issue", priority="Critical").result(5)
+        assert db.update_ticket(ticket_id, assignee="Sarah Ali").result(5) is True
+        assert db.resolve_ticket(ticket_id).result(5) is True
+        assert db.update_ticket(9999, assignee="Nobody").result(5) is False
+        (ticket,) = db.get_tickets([ticket_id])
+        assert ticket["status"] == "Resolved"
+        assert ticket["assignee"] == "Sarah Ali"
+        assert ticket["resolved_at"] is not None
+    finally:
+        db.writer.stop()
+
+
+def test_bad_write_does_not_fail_its_batch(tmp_path):
+    db = DBManager(tmp_path / "w.db", partitioned=False)
+    db.create_tables()
+    writer = TicketWriter(db, max_latency_ms=50)
+    try:
+        good = writer.submit("create", {"title": "ok", "category": "Email Issue"})
+        bad = writer.submit("create", {"title": "bad", "category": "Email Issue", "nope": 1})
+        assert good.result(5) == 1
+        with pytest.raises(ValueError):
+            bad.result(5)
+        assert writer.stats()["batches"] == 1
+    finally:
+        writer.stop()
+
+
+def test_full_queue_applies_back_pressure(tmp_path):
+    db = DBManager(tmp_path / "w.db", partitioned=False)
+    db.create_tables()
+    writer = TicketWriter(db, max_queue=1, max_batch=1, put_timeout=0.01)
+    gate = threading.Event()
+    writer.listeners.append(lambda applied: gate.wait(5))
+    try:
+        writer.submit("noop")  # taken by the writer, which then blocks in the listener
+        with pytest.raises(WriteQueueFull):
+            for _ in range(5):
+                writer.submit("noop")
+    finally:
+        gate.set()
+        writer.stop()
+
+
+def test_unexpected_error_fails_batch_and_writer_keeps_running(tmp_path):
+    db = DBManager(tmp_path / "w.db", partitioned=False)
+    db.create_tables()
+    writer = TicketWriter(db)
+    commit_batch = writer._commit_batch
+    calls = []
+
+    def broken_once(conn, batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError("disk on fire")
+        return commit_batch(conn, batch)
+
+    writer._commit_batch = broken_once
+    try:
+        with pytest.raises(RuntimeError, match="disk on fire"):
+            writer.submit("noop").result(5)
+        assert writer.submit("create", {"title": "ok", "category": "Email Issue"}).result(5) == 1
+        assert writer.stats()["failed"] == 1
+    finally:
+        writer.stop()
+
+
+def test_concurrent_start_stop_keeps_a_single_writer_thread(tmp_path):
+    db = DBManager(tmp_path / "w.db", partitioned=False)
+    db.create_tables()
+    writer = TicketWriter(db, max_batch=5, max_latency_ms=1)
+    commit_batch = writer._commit_batch
+    active, peak = [0], [0]
+    guard = threading.Lock()
+
+    def counting(conn, batch):
+        with guard:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        try:
+            return commit_batch(conn, batch)
+        finally:
+            with guard:
+                active[0] -= 1
+
+    writer._commit_batch = counting
+    futures, done = [], threading.Event()
+
+    def producer():
+        for _ in range(200):
+            futures.append(writer.submit("noop"))
+
+    def stopper():
+        while not done.is_set():
+            writer.stop()
+
+    threads = [threading.Thread(target=producer) for _ in range(4)]
+    toggler = threading.Thread(target=stopper)
+    toggler.start()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    done.set()
+    toggler.join()
+    try:
+        for future in futures:
+            future.result(5)
+        assert peak[0] == 1
+    finally:
+        writer.stop()
+
+
+def test_write_queued_after_a_racing_stop_is_applied(tmp_path):
+    db = DBManager(tmp_path / "w.db", partitioned=False)
+    db.create_tables()
+    writer = TicketWriter(db).start()
+    put = writer._queue.put
+    raced = []
+
+    def stop_then_put(item, timeout=None):
+        if item is not None and not raced:
+            raced.append(True)
+            writer.stop()  # lands between submit()'s start() and its put()
+        put(item, timeout=timeout)
+
+    writer._queue.put = stop_then_put
+    try:
+        assert writer.submit("create", {"title": "late", "category": "Email Issue"}).result(5) == 1
+    finally:
+        writer.stop()
+
+
+def test_listener_errors_are_counted_and_logged(tmp_path, caplog):
+    db = DBManager(tmp_path / "w.db", partitioned=False)
+    db.create_tables()
+    writer = TicketWriter(db)
+    writer.listeners.append(lambda applied: 1 / 0)
+    try:
+        writer.flush(5)
+        writer.flush(5)  # the first flush's listener has run once the second resolves
+        assert writer.stats()["listener_errors"] >= 1
+        assert "listener" in caplog.text
+    finally:
+        writer.stop()
@@ -1,4 +1,6 @@
 """Analytics helpers: format DB results for display and compute derived metrics."""
+import csv
+import io
 import json
 from datetime import datetime
 
@@ -31,9 +33,72 @@ def format_db_results(results: dict) -> str:
             avg = row.get("avg_resolution_hours") or 0
             out += f"- {row.get('category', '')} ({row.get('priority', '')}): {avg:.1f}h\n"
         return out
+    if results.get("query_type") == "list":
+        tickets = results.get("tickets") or []
+        if not tickets:
+            return "**Tickets**: none match these filters.\n"
+        more = " (more available)" if results.get("next_cursor") else ""
+        out = f"**Tickets** (showing {len(tickets)}{more}):\n"
+        for t in tickets:
+            out += (
+                f"- #{t.get('ticket_id')} [{t.get('priority', '')}] {t.get('title', '')} — "
+                f"{t.get('status', '')}, {t.get('assignee') or 'unassigned'}\n"
+            )
+        return out
+    if results.get("query_type") == "anomaly":
+        anomalies = results.get("anomalies") or []
+        if not anomalies:
+            return (
+                f"**Anomalies**: nothing unusual as of {results.get('as_of')} "
+                f"({results.get('streams_checked', 0)} streams checked).\n"
+            )
+        out = f"**Anomalies** (|z| ≥ {results.get('threshold')}):\n"
+        for a in anomalies:
+            metric = "SLA breaches" if a.get("metric") == "sla_breach" else "Ticket volume"
+            scope = "all tickets" if a.get("dimension") == "all" else a.get("value")
+            when = f"{a.get('day')} so far" if a.get("in_progress") else a.get("day")
+            out += (
+                f"- {metric} {a.get('direction')} for {scope} on {when}: "
+                f"{a.get('observed')} vs ~{a.get('expected')} expected (z={a.get('z')})\n"
+            )
+        return out
     return json.dumps(results, indent=2, default=str)
 
 
+def iter_csv(rows, columns, rows_per_chunk: int = 1000):
+    """Yield CSV text (header first) in chunks of rows_per_chunk rows from any row-dict iterable."""
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= rows_per_chunk:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    if buf.tell():
+        yield buf.getvalue()
+
+
 def results_to_json_string(results: dict) -> str:
     """Convert results to JSON string for agent context."""
     return json.dumps(results, indent=2, default=str)
+
+
+def format_similar_tickets(tickets: list) -> str:
+    """Format similar past tickets (from utils.similarity) as agent context."""
+    if not tickets:
+        return "No similar past tickets found."
+    lines = []
+    for t in tickets:
+        hours = t.get("resolution_hours")
+        resolved = f"resolved in {hours:.1f}h" if hours is not None else "not resolved yet"
+        lines.append(
+            f"- #{t.get('ticket_id')} [{t.get('similarity', 0):.2f}] {t.get('title', '')} "
+            f"({t.get('category', '')}, {t.get('priority', '')}, {t.get('status', '')}, "
+            f"assignee: {t.get('assignee') or 'unassigned'}, {resolved})"
+        )
+    return "\n".join(lines)
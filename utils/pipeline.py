@@ -0,0 +1,128 @@
+"""
+Question pipeline shared by the Streamlit app and load_test.py:
+analyze_question -> DBManager.execute_query -> similar tickets -> agent crew.
+Each stage is timed (per request and in the process-wide tracer).
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from database.db_manager import DBManager
+from utils.analytics import format_db_results, format_similar_tickets, results_to_json_string
+from utils.query_processor import analyze_question
+from utils.tracing import tracer
+
+try:
+    from config import SIMILAR_TICKETS_K
+except ImportError:
+    SIMILAR_TICKETS_K = 5
+
+try:
+    from utils.similarity import TicketIndex, find_similar_tickets
+    SIMILARITY_AVAILABLE = True
+except ImportError:
+    SIMILARITY_AVAILABLE = False
+
+try:
+    from agents.crew_setup import ITSupportCrew
+    from agents.llm_scheduler import role_priority
+    AGENTS_AVAILABLE = True
+    AGENTS_ERROR = None
+except Exception as e:
+    AGENTS_AVAILABLE = False
+    AGENTS_ERROR = str(e)
+
+logger = logging.getLogger(__name__)
+
+PipelineResult = namedtuple("PipelineResult", "response db_results timings error")
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_ticket_index():
+    """Process-wide similar-ticket index (memory-mapped, synced incrementally per question)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = TicketIndex()
+        return _index
+
+
+def lookup_similar_tickets(db, question: str, index=None) -> str:
+    """Top-k similar past tickets as agent context; empty string if retrieval is unavailable."""
+    if not SIMILARITY_AVAILABLE or SIMILAR_TICKETS_K <= 0:
+        return ""
+    try:
+        # The span records the error type; the answer goes on without similar tickets.
+        with tracer.span("similar_tickets.lookup"):
+            matches = find_similar_tickets(db, index or get_ticket_index(), question, k=SIMILAR_TICKETS_K)
+    except Exception:
+        logger.exception("similar-ticket lookup failed; answering without similar tickets")
+        return ""
+    return format_similar_tickets(matches) if matches else ""
+
+
+@contextmanager
+def _stage(timings: dict, name: str):
+    """Time a stage into timings[name] (ms) and the tracer's pipeline.<name> histogram."""
+    start = time.perf_counter()
+    with tracer.span(f"pipeline.{name}"):
+        try:
+            yield
+        finally:
+            timings[name] = (time.perf_counter() - start) * 1000
+
+
+def run_pipeline(question: str, role: str = "Support Agent", db=None, crew=None, index=None,
+                 use_agents: bool = AGENTS_AVAILABLE) -> PipelineResult:
+    """
+    Run the pipeline. Analysis/DB errors propagate; crew errors are returned in
+    .error (with response None) so callers can fall back to the DB results.
+    crew: an ITSupportCrew to reuse (default: a new one at the role's scheduler priority).
+    index: TicketIndex matching db (default: the process-wide index over data/).
+    """
+    timings = {}
+    db = db or DBManager()
+    error = None
+    response = None
+    with _stage(timings, "total"):
+        with _stage(timings, "analyze_question"):
+            analysis = analyze_question(question)
+        with _stage(timings, "execute_query"):
+            db_results = db.execute_query(analysis)
+        if use_agents:
+            try:
+                with _stage(timings, "similar_tickets"):
+                    similar = lookup_similar_tickets(db, question, index)
+                with _stage(timings, "crew"):
+                    crew = crew or ITSupportCrew(priority=role_priority(role))
+                    response = crew.process_question(
+                        question=question,
+                        role=role,
+                        db_results=results_to_json_string(db_results),
+                        similar_tickets=similar,
+                    )
+            except Exception as e:
+                error = e
+    return PipelineResult(response, db_results, timings, error)
+
+
+def answer_question(question: str, role: str = "Support Agent", db=None):
+    """(response, db_results) for the app, falling back to formatted DB results without AI."""
+    result = run_pipeline(question, role, db)
+    if result.response is not None:
+        return result.response, result.db_results
+    if result.error is not None:
+        response = (
+            f"📊 **Results:**\n\n{format_db_results(result.db_results)}\n\n"
+            f"⚠️ AI unavailable: {result.error}"
+        )
+        return response, result.db_results
+    response = (
+        f"📊 **Results:**\n\n{format_db_results(result.db_results)}\n\n"
+        "💡 Add GROQ_API_KEY to .env or set LLM_PROVIDER=ollama for AI responses."
+    )
+    return response, result.db_results
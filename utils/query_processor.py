@@ -4,18 +4,38 @@ from natural language questions. Used by the app to build analysis dict for DBMa
 """
 import re
 
+# Keyword -> ticket category (first match wins; see database.sample_data.CATEGORIES)
+CATEGORY_KEYWORDS = [
+    ("vpn", "VPN Issue"),
+    ("password", "Password Reset"),
+    ("printer", "Printer Problem"),
+    ("email", "Email Issue"),
+    ("network", "Network Issue"),
+    ("hardware", "Hardware Problem"),
+    ("software", "Software Bug"),
+    ("bug", "Software Bug"),
+    ("access request", "Access Request"),
+    ("crash", "System Crash"),
+]
+
 
 def analyze_question(question: str) -> dict:
     """
     Analyze a natural language question and return:
-    - type: count | trend | average | sla | assignee | performance | general
+    - type: count | trend | average | sla | assignee | performance | list | anomaly | general
     - status: Open | In Progress | Resolved | Closed | Pending | None
     - priority: Low | Medium | High | Critical | None
+    - category: ticket category from keywords (e.g. "vpn" -> VPN Issue) | None
+    - assignee: name prefix from "assigned to <name>" | None
     - time_filter: { days: int } | None
     """
     q = question.lower().strip()
     query_type = "general"
-    if any(w in q for w in ["how many", "count", "number of"]):
+    if re.search(r"\b(list|export)\b", q):
+        query_type = "list"
+    elif re.search(r"\b(unusual|anomal\w*|abnormal|spikes?|surges?|out of the ordinary)\b", q):
+        query_type = "anomaly"
+    elif any(w in q for w in ["how many", "count", "number of"]):
         query_type = "count"
     elif any(w in q for w in ["trend", "over time"]):
         query_type = "trend"
@@ -56,10 +76,28 @@ def analyze_question(question: str) -> dict:
         "type": query_type,
         "status": status,
         "priority": priority,
+        "category": _extract_category(q),
+        "assignee": _extract_assignee(q),
         "time_filter": time_filter,
     }
 
 
+def _extract_category(question: str) -> str | None:
+    """Extract ticket category from keywords (e.g. 'vpn tickets' -> 'VPN Issue')."""
+    for keyword, category in CATEGORY_KEYWORDS:
+        if re.search(rf"\b{keyword}", question):
+            return category
+    return None
+
+
+def _extract_assignee(question: str) -> str | None:
+    """Extract assignee name prefix (e.g. 'assigned to sarah' -> 'Sarah')."""
+    m = re.search(r"assigned to (\w+)", question)
+    if not m or m.group(1) in ("me", "anyone", "nobody", "someone", "the", "a"):
+        return None
+    return m.group(1).title()
+
+
 def _extract_time_filter(question: str) -> dict | None:
     """Extract time period from question (e.g. this week -> { days: 7 })."""
     if "today" in question:
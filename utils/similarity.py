@@ -0,0 +1,196 @@
+"""
+Offline similar-ticket retrieval: a hashing vectorizer over title + description
+and a float32 vector index stored as memory-mapped files in data/.
+No network or model downloads; search is a chunked NumPy brute-force top-k.
+"""
+import json
+import math
+import re
+import threading
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from config import DATA_DIR, VECTOR_DIM
+except ImportError:
+    DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+    VECTOR_DIM = 512
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Rows scored per matmul; keeps peak memory bounded on multi-million-row indexes.
+SEARCH_CHUNK_ROWS = 262_144
+
+
+def ticket_text(title, description) -> str:
+    """Text used for embedding a ticket."""
+    return f"{title or ''} {description or ''}"
+
+
+def vectorize(text: str, dim: int = VECTOR_DIM) -> np.ndarray:
+    """
+    Hash unigrams and bigrams of text into a dim-sized, L2-normalised float32 vector.
+    Uses crc32 (stable across processes, unlike hash()) and a sign bit to reduce collisions.
+    """
+    tokens = _TOKEN_RE.findall((text or "").lower())
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    counts = {}
+    for feat in features:
+        h = zlib.crc32(feat.encode("utf-8"))
+        idx = h % dim
+        sign = 1.0 if (h >> 31) & 1 else -1.0
+        counts[idx] = counts.get(idx, 0.0) + sign
+    vec = np.zeros(dim, dtype=np.float32)
+    for idx, c in counts.items():
+        # Sublinear term frequency, keeping the hashed sign.
+        vec[idx] = math.copysign(1.0 + math.log(abs(c)), c) if c else 0.0
+    norm = float(np.linalg.norm(vec))
+    if norm:
+        vec /= norm
+    return vec
+
+
+class TicketIndex:
+    """
+    Append-only vector index: <name>.f32 holds an (n, dim) float32 matrix,
+    <name>.ids holds the matching int64 ticket ids. Both are memory-mapped for search.
+    <name>.meta.json records the database the vectors came from; sync() rebuilds the
+    index when that database was replaced, so stale vectors never map to new ticket ids.
+    """
+
+    def __init__(self, index_dir=None, dim: int = VECTOR_DIM, name: str = "ticket_vectors"):
+        self.index_dir = Path(index_dir or DATA_DIR)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.vectors_path = self.index_dir / f"{name}.f32"
+        self.ids_path = self.index_dir / f"{name}.ids"
+        self.meta_path = self.index_dir / f"{name}.meta.json"
+        self._vectors = None
+        self._ids = None
+        self._lock = threading.RLock()  # one syncer at a time; searches read a consistent snapshot
+
+    def __len__(self):
+        return self._count()
+
+    def _count(self) -> int:
+        """Rows fully written to both files (tolerates a torn append)."""
+        if not self.vectors_path.exists() or not self.ids_path.exists():
+            return 0
+        n_vec = self.vectors_path.stat().st_size // (self.dim * 4)
+        n_ids = self.ids_path.stat().st_size // 8
+        return min(n_vec, n_ids)
+
+    def _load(self):
+        """Map the on-disk matrix; remapped after every append."""
+        n = self._count()
+        if n == 0:
+            self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+            self._ids = np.zeros(0, dtype=np.int64)
+            return
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(n, self.dim))
+        self._ids = np.memmap(self.ids_path, dtype=np.int64, mode="r", shape=(n,))
+
+    def _snapshot(self):
+        with self._lock:
+            if self._vectors is None:
+                self._load()
+            return self._vectors, self._ids
+
+    def last_ticket_id(self) -> int:
+        """Highest indexed ticket id (tickets are appended in id order)."""
+        _, ids = self._snapshot()
+        return int(ids[-1]) if len(ids) else 0
+
+    def append(self, ticket_ids, texts):
+        """Vectorize texts and append them to the index."""
+        if not ticket_ids:
+            return 0
+        matrix = np.stack([vectorize(t, self.dim) for t in texts]).astype(np.float32)
+        ids = np.asarray(ticket_ids, dtype=np.int64)
+        with self._lock:
+            with open(self.vectors_path, "ab") as f:
+                f.write(matrix.tobytes())
+            with open(self.ids_path, "ab") as f:
+                f.write(ids.tobytes())
+            self._vectors = self._ids = None
+        return len(ids)
+
+    def reset(self):
+        """Drop every indexed vector."""
+        with self._lock:
+            for path in (self.vectors_path, self.ids_path, self.meta_path):
+                path.unlink(missing_ok=True)
+            self._vectors = self._ids = None
+
+    def _ensure_source(self, db):
+        """Rebuild from scratch if the index was built from another database (or a since-recreated one)."""
+        source = {"db_path": str(Path(db.db_path).resolve()), "db_identity": db.identity(), "dim": self.dim}
+        try:
+            meta = json.loads(self.meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = None
+        if meta != source or self.last_ticket_id() > db.max_ticket_id():
+            self.reset()
+            self.meta_path.write_text(json.dumps(source), encoding="utf-8")
+
+    def sync(self, db, batch_size: int = 5000) -> int:
+        """Append tickets from db that were created since the last sync."""
+        added = 0
+        with self._lock:
+            self._ensure_source(db)
+            while True:
+                rows = db.fetch_ticket_texts(after_id=self.last_ticket_id(), limit=batch_size)
+                if not rows:
+                    return added
+                added += self.append(
+                    [r["ticket_id"] for r in rows],
+                    [ticket_text(r["title"], r["description"]) for r in rows],
+                )
+
+    def search(self, text: str, k: int = 5, exclude_ids=None):
+        """Return up to k (ticket_id, score) pairs ordered by cosine similarity."""
+        vectors, ids = self._snapshot()
+        n = len(ids)
+        if n == 0 or k <= 0:
+            return []
+        query = vectorize(text, self.dim)
+        exclude = set(exclude_ids or ())
+        want = k + len(exclude)
+        best_scores = np.zeros(0, dtype=np.float32)
+        best_rows = np.zeros(0, dtype=np.int64)
+        for start in range(0, n, SEARCH_CHUNK_ROWS):
+            scores = vectors[start:start + SEARCH_CHUNK_ROWS] @ query
+            if len(scores) > want:
+                top = np.argpartition(-scores, want - 1)[:want]
+            else:
+                top = np.arange(len(scores))
+            best_scores = np.concatenate([best_scores, scores[top]])
+            best_rows = np.concatenate([best_rows, top + start])
+            if len(best_scores) > want:
+                keep = np.argpartition(-best_scores, want - 1)[:want]
+                best_scores, best_rows = best_scores[keep], best_rows[keep]
+        order = np.argsort(-best_scores, kind="stable")
+        out = []
+        for i in order:
+            ticket_id = int(ids[best_rows[i]])
+            if ticket_id in exclude:
+                continue
+            out.append((ticket_id, float(best_scores[i])))
+            if len(out) == k:
+                break
+        return out
+
+
+def find_similar_tickets(db, index: TicketIndex, text: str, k: int = 5, exclude_ids=None):
+    """Sync the index, search it, and return ticket dicts with a 'similarity' score."""
+    index.sync(db)
+    matches = index.search(text, k=k, exclude_ids=exclude_ids)
+    if not matches:
+        return []
+    tickets = {t["ticket_id"]: t for t in db.get_tickets([tid for tid, _ in matches])}
+    out = []
+    for tid, score in matches:
+        if tid in tickets:
+            out.append({**tickets[tid], "similarity": round(score, 4)})
+    return out
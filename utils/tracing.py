@@ -0,0 +1,244 @@
+"""
+Lightweight per-stage latency tracing: spans feed fixed-bucket histograms,
+slow SQL is logged with its EXPLAIN QUERY PLAN, and histograms export to
+JSONL or Prometheus text format. Standard library only.
+"""
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    from config import METRICS_PATH, SLOW_QUERY_LOG_PATH, SLOW_QUERY_MS
+except ImportError:
+    _DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+    METRICS_PATH = _DATA_DIR / "metrics.jsonl"
+    SLOW_QUERY_LOG_PATH = _DATA_DIR / "slow_queries.jsonl"
+    SLOW_QUERY_MS = 200.0
+
+# Upper bounds in milliseconds; the last bucket is +Inf.
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+class Histogram:
+    """Cumulative-style latency histogram (counts per bucket, sum, max)."""
+
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, q: float) -> float:
+        """Estimate quantile q (0..1) by linear interpolation inside the bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= rank:
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else self.max_ms
+                return min(lo + (hi - lo) * ((rank - seen) / c), self.max_ms)
+            seen += c
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 3),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.counts)),
+        }
+
+
+class _TimedCursor:
+    """sqlite3 cursor proxy for Tracer.execute_sql: execute + fetch time is one observation."""
+
+    def __init__(self, tracer, conn, cursor, query, params, ms):
+        self._tracer = tracer
+        self._conn = conn
+        self._cursor = cursor
+        self._query = query
+        self._params = params
+        self._ms = ms
+        self._done = False
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def _timed(self, fetch, *args):
+        start = time.perf_counter()
+        rows = fetch(*args)
+        self._ms += (time.perf_counter() - start) * 1000
+        return rows
+
+    def fetchone(self):
+        row = self._timed(self._cursor.fetchone)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        size = size or self._cursor.arraysize
+        rows = self._timed(self._cursor.fetchmany, size)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(self._cursor.fetchall)
+        self._finish()
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+    def _finish(self):
+        if not self._done:
+            self._done = True
+            self._tracer._finish_sql(self._conn, self._query, self._params, self._ms)
+
+
+class Tracer:
+    """Process-wide span recorder. Use the module-level `tracer` instance."""
+
+    def __init__(self, slow_query_ms: float = SLOW_QUERY_MS, slow_log_path=SLOW_QUERY_LOG_PATH):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.recent_spans = deque(maxlen=200)
+        self.slow_queries = deque(maxlen=100)
+        self.slow_query_ms = slow_query_ms
+        self.slow_log_path = Path(slow_log_path) if slow_log_path else None
+
+    def observe(self, name: str, ms: float, **attrs):
+        """Record a duration for name (also used for timings measured elsewhere)."""
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            hist.observe(ms)
+            self.recent_spans.append({"name": name, "ms": round(ms, 3), **attrs})
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """Time the enclosed block; errors are recorded and re-raised."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            attrs["error"] = type(e).__name__
+            raise
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000, **attrs)
+
+    def execute_sql(self, conn, query: str, params=()):
+        """
+        conn.execute with timing. Returns a cursor proxy that keeps adding fetch time
+        (SQLite does most of its work while stepping rows) and records db.sql once the
+        rows are exhausted or the cursor is closed; slow statements are logged with
+        EXPLAIN QUERY PLAN.
+        """
+        start = time.perf_counter()
+        cur = conn.execute(query, params)
+        return _TimedCursor(self, conn, cur, query, params, (time.perf_counter() - start) * 1000)
+
+    def _finish_sql(self, conn, query, params, ms):
+        self.observe("db.sql", ms)
+        if ms >= self.slow_query_ms:
+            self._log_slow_query(conn, query, params, ms)
+
+    def _log_slow_query(self, conn, query, params, ms):
+        try:
+            plan = [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()]
+        except Exception as e:
+            plan = [f"unavailable: {e}"]
+        entry = {
+            "ts": datetime.now().isoformat(),
+            "duration_ms": round(ms, 3),
+            "sql": " ".join(query.split()),
+            "params": [str(p) for p in params],
+            "plan": plan,
+        }
+        with self._lock:
+            self.slow_queries.append(entry)
+            if self.slow_log_path:
+                self.slow_log_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.slow_log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+
+    def summary(self) -> list:
+        """Per-stage rows: name, count, avg/p50/p95/max in ms (sorted by name)."""
+        with self._lock:
+            items = sorted(self.histograms.items())
+            return [
+                {
+                    "stage": name,
+                    "count": h.count,
+                    "avg_ms": round(h.sum_ms / h.count, 1) if h.count else 0.0,
+                    "p50_ms": round(h.quantile(0.5), 1),
+                    "p95_ms": round(h.quantile(0.95), 1),
+                    "max_ms": round(h.max_ms, 1),
+                }
+                for name, h in items
+            ]
+
+    def export_jsonl(self, path=METRICS_PATH) -> Path:
+        """Append one snapshot line with every histogram to path."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            snapshot = {
+                "ts": datetime.now().isoformat(),
+                "histograms": {name: h.to_dict() for name, h in self.histograms.items()},
+            }
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot) + "\n")
+        return path
+
+    def prometheus_text(self, metric: str = "itbot_stage_latency_seconds") -> str:
+        """Render histograms in Prometheus text exposition format (seconds)."""
+        lines = [
+            f"# HELP {metric} Latency of IT support bot pipeline stages.",
+            f"# TYPE {metric} histogram",
+        ]
+        with self._lock:
+            for name, h in sorted(self.histograms.items()):
+                label = name.replace("\\", "\\\\").replace('"', '\\"')
+                cumulative = 0
+                for bound, c in zip(list(h.buckets) + ["+Inf"], h.counts):
+                    cumulative += c
+                    le = "+Inf" if bound == "+Inf" else f"{bound / 1000:g}"
+                    lines.append(f'{metric}_bucket{{stage="{label}",le="{le}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{stage="{label}"}} {h.sum_ms / 1000:.6f}')
+                lines.append(f'{metric}_count{{stage="{label}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.recent_spans.clear()
+            self.slow_queries.clear()
+
+
+tracer = Tracer()